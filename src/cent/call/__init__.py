@@ -1 +1,3 @@
-from .call import CallClient, CallServer
+from .aio import AsyncCallClient, AsyncCallServer
+from .cache import CachePolicy
+from .call import PRIORITY_HIGH, PRIORITY_LOW, PRIORITY_NORMAL, CallClient, CallServer
@@ -0,0 +1,161 @@
+import asyncio
+import inspect
+import typing as T
+from concurrent.futures import Executor, ThreadPoolExecutor
+
+from cent.call.call import LANE_WEIGHTS, STREAM_TIMEOUT, STREAM_WINDOW, CallClient, CallServer
+from cent.logging import Logger
+from cent.rhythm.unit import Seconds
+
+log = Logger(__name__)
+
+
+class AsyncCallServer(CallServer):
+    class Batch(CallServer.Batch):
+        async def run_async(self) -> None:
+            for func, args in self.calls:
+                if self.cached(func, args):
+                    continue
+
+                limit = self.server.func_limit(func)  # type: ignore
+                if limit is not None:
+                    await limit.acquire()
+
+                try:
+                    if func.executor is not None and not inspect.iscoroutinefunction(func.f):
+                        ret = await asyncio.wrap_future(self.submit(func, args))
+                    else:
+                        ret = self.invoke(func, args)
+                        if inspect.isawaitable(ret):
+                            ret = await ret
+                    self.add_ret(True, ret)
+                except Exception as e:
+                    self.add_ret(False, e)
+                finally:
+                    if limit is not None:
+                        limit.release()
+
+            self.server.reply(self)
+
+    class Stream(CallServer.Stream):
+        def __init__(self, server: CallServer, msg_id: bytes, idx: int, gen: T.Any) -> None:
+            super().__init__(server, msg_id, idx, gen)
+            self.async_credit: T.Optional[asyncio.Semaphore] = None
+            self.task: T.Optional[asyncio.Task] = None
+
+        def start(self) -> None:
+            if not inspect.isasyncgen(self.gen):
+                return super().start()
+
+            # NOTE: Async generators stay on the server loop, sync ones get a pump thread
+            self.async_credit = asyncio.Semaphore(STREAM_WINDOW)
+            self.task = asyncio.get_running_loop().create_task(self.pump_async())
+
+        def ack(self, n: int) -> None:
+            if self.async_credit is None:
+                return super().ack(n)
+
+            for _ in range(min(n, STREAM_WINDOW)):
+                self.async_credit.release()
+
+        async def pump_async(self) -> None:
+            seq = 0
+            err = None
+            try:
+                async for item in self.gen:
+                    try:
+                        await asyncio.wait_for(self.async_credit.acquire(), STREAM_TIMEOUT)  # type: ignore
+                    except asyncio.TimeoutError:
+                        err = ["TimeoutError", "Stream consumer stalled"]
+                        break
+                    self.send({"seq": seq, "item": list(item) if isinstance(item, tuple) else item})
+                    seq += 1
+            except Exception as e:
+                err = [e.__class__.__name__, str(e)]
+            finally:
+                await self.gen.aclose()
+                self.server.end_stream(self)
+
+            self.send({"seq": seq, "end": True, "err": err})
+
+    def __init__(
+        self,
+        service: str,
+        server_uri: str,
+        channel: bytes,
+        executor: T.Optional[Executor] = None,
+        dedup_ttl: Seconds = 60 * 5,
+        dedup_size: int = 10_000,
+        limit: int = 1000,
+        lanes: T.Sequence[int] = LANE_WEIGHTS,
+        metrics: bool = True,
+        reply_bytes: bool = False,
+    ) -> None:
+        super().__init__(
+            service, server_uri, channel, executor, dedup_ttl, dedup_size, lanes, metrics=metrics, reply_bytes=reply_bytes
+        )
+        self.limit = limit
+        self.func_limits: T.Dict[str, asyncio.Semaphore] = {}
+        self.recv_executor = ThreadPoolExecutor(1, thread_name_prefix="async_call_server|recv")
+
+    def func_limit(self, func: CallServer.Func) -> T.Optional[asyncio.Semaphore]:
+        if func.limit is None:
+            return None
+        limit = self.func_limits.get(func.name, None)
+        if limit is None:
+            limit = self.func_limits[func.name] = asyncio.Semaphore(func.limit)
+        return limit
+
+    def start(self) -> None:
+        asyncio.run(self.serve())
+
+    async def serve(self) -> None:
+        loop = asyncio.get_running_loop()
+        ready = asyncio.Event()
+        log.debug(f"Started async call server for {self.service} | {self.instance.hex()}")
+
+        for msg in await loop.run_in_executor(self.recv_executor, self.warmup):
+            self.handle(msg)
+
+        dispatch = loop.create_task(self.dispatch(ready))
+        while not dispatch.done():
+            _, msg = await loop.run_in_executor(self.recv_executor, self.root.recv)
+            if self.route(msg):
+                continue
+            self.handle(msg)
+            ready.set()
+
+    async def dispatch(self, ready: asyncio.Event) -> None:
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.limit)
+        tasks: T.Set[asyncio.Task] = set()
+
+        while True:
+            await semaphore.acquire()
+            batch = self.scheduler.take()
+            while batch is None:
+                ready.clear()
+                await ready.wait()
+                batch = self.scheduler.take()
+
+            task = loop.create_task(batch.run_async())  # type: ignore
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+
+class AsyncCallClient:
+    def __init__(self, server_uri: str, channel: bytes, timeout: Seconds = 5) -> None:
+        self.client = CallClient(server_uri, channel, timeout)
+        self.metrics = self.client.metrics
+
+    async def call(
+        self,
+        service: str,
+        func: str,
+        args: T.Dict,
+        no_ret: bool = False,
+        timeout: T.Optional[Seconds] = None,
+        priority: T.Optional[int] = None,
+    ) -> CallClient.Ret:
+        return await asyncio.wrap_future(self.client.submit(service, func, args, no_ret, timeout, priority))
@@ -0,0 +1,286 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import sys
+import threading
+import time
+import typing as T
+from concurrent.futures import Future, ThreadPoolExecutor
+from uuid import uuid4
+
+from cent.call import AsyncCallServer, CallClient, CallServer
+from cent.call.metrics import Histogram
+from cent.ether.impl.root import Root
+from cent.ether.impl.ws_jsonx import ServerCom
+from cent.rhythm.unit import Seconds
+
+SERVICE = "bench"
+CHANNEL = b"\xbe" * 16
+
+
+def echo(data: str) -> str:
+    return data
+
+
+def sleep(data: str, ms: float = 1) -> str:
+    time.sleep(ms / 1000)
+    return data
+
+
+def cpu(data: str, us: float = 100) -> str:
+    end = time.perf_counter() + us / 1e6
+    while time.perf_counter() < end:
+        pass
+    return data
+
+
+HANDLERS: T.Dict[str, T.Callable] = {"echo": echo, "sleep": sleep, "cpu": cpu}
+
+
+def start_repeater(port: int) -> Root:
+    root = Root()
+    com = ServerCom(root, "127.0.0.1", port)
+    root.add_com(com)
+    com.start()
+    root.start()
+
+    def loop() -> None:
+        while root.active:
+            try:
+                root.send(*root.recv(1))
+            except TimeoutError:
+                pass
+
+    threading.Thread(target=loop, name="bench|repeater", daemon=True).start()
+    return root
+
+
+def serve(uri: T.Optional[str], port: int, kind: str, workers: int, ready: T.Any) -> None:
+    if uri is None:
+        start_repeater(port)
+        uri = f"ws://127.0.0.1:{port}"
+
+    executor = ThreadPoolExecutor(workers) if workers else None
+    server = (AsyncCallServer if kind == "async" else CallServer)(SERVICE, uri, CHANNEL, executor)
+    for name, f in HANDLERS.items():
+        server.register(name, f)
+    ready.set()
+    server.start()
+
+
+class Recorder:
+    def __init__(self, interval: T.Optional[Seconds]) -> None:
+        self.interval = interval
+        self.latency = Histogram()
+        self.corrected = Histogram()
+        self.calls = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.recording = False
+
+    def record(self, future: Future, intended: float, sent: float, n: int) -> None:
+        now = time.perf_counter()
+        try:
+            ok = all(success for success, *_ in future.result().rets)
+        except Exception:
+            ok = False
+
+        with self.lock:
+            if not self.recording:
+                return
+            self.calls += n
+            if not ok:
+                self.errors += n
+            self.latency.record(now - sent)
+            if self.interval is None:
+                self.corrected.record(now - intended)
+            else:
+                self.corrected.record_corrected(now - sent, self.interval)
+
+
+def message(func: str, args: T.Dict, batch: int) -> T.Dict:
+    return {"msg_id": uuid4().bytes, "service": SERVICE, "no_ret": False, "calls": [[func, args]] * batch}
+
+
+def closed_loop(
+    clients: T.List[CallClient], recorder: Recorder, func: str, args: T.Dict, batch: int, concurrency: int, stop: float
+) -> None:
+    def worker(client: CallClient) -> None:
+        next_send = time.perf_counter()
+        while next_send < stop:
+            sent = time.perf_counter()
+            future = client.send(message(func, args, batch))
+            future.exception()
+            recorder.record(future, sent, sent, batch)
+
+            if recorder.interval is None:
+                next_send = time.perf_counter()
+            else:
+                next_send += recorder.interval
+                time.sleep(max(next_send - time.perf_counter(), 0))
+
+    threads = [threading.Thread(target=worker, args=(clients[i % len(clients)],)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def open_loop(
+    clients: T.List[CallClient], recorder: Recorder, func: str, args: T.Dict, batch: int, rate: float, stop: float
+) -> T.List[Future]:
+    # NOTE: Messages go out on a fixed schedule no matter how slow the replies are, latency counts from the schedule
+    futures: T.List[Future] = []
+    interval = 1 / rate
+    start = time.perf_counter()
+    for i in itertools.count():
+        intended = start + i * interval
+        if intended >= stop:
+            return futures
+        delay = intended - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        sent = time.perf_counter()
+        future = clients[i % len(clients)].send(message(func, args, batch))
+        future.add_done_callback(lambda f, intended=intended, sent=sent: recorder.record(f, intended, sent, batch))
+        futures.append(future)
+    return futures
+
+
+def bench(
+    clients: T.List[CallClient],
+    mode: str,
+    func: str,
+    concurrency: int,
+    batch: int,
+    payload: int,
+    rate: T.Optional[float],
+    duration: Seconds,
+    warmup: Seconds,
+) -> T.Dict[str, T.Any]:
+    args = {"data": "x" * payload}
+    if mode == "open":
+        recorder = Recorder(None)
+    else:
+        recorder = Recorder(None if rate is None else concurrency / rate)
+
+    threading.Timer(warmup, lambda: setattr(recorder, "recording", True)).start()
+    start = time.perf_counter()
+    stop = start + warmup + duration
+    if mode == "open":
+        for future in open_loop(clients, recorder, func, args, batch, rate or 1000, stop):
+            future.exception()
+    else:
+        closed_loop(clients, recorder, func, args, batch, concurrency, stop)
+
+    with recorder.lock:
+        recorder.recording = False
+    elapsed = time.perf_counter() - start - warmup
+
+    return {
+        "mode": mode,
+        "func": func,
+        "concurrency": concurrency,
+        "batch": batch,
+        "payload": payload,
+        "rate": rate,
+        "calls": recorder.calls,
+        "errors": recorder.errors,
+        "throughput": recorder.calls / elapsed,
+        "latency": recorder.latency.snapshot(),
+        "corrected": recorder.corrected.snapshot(),
+    }
+
+
+def key(r: T.Dict[str, T.Any]) -> str:
+    return f"{r['mode']}/{r['func']}/c{r['concurrency']}/b{r['batch']}/p{r['payload']}/r{r['rate']}"
+
+
+def report(results: T.List[T.Dict[str, T.Any]], baseline: T.Optional[T.Dict[str, T.Dict]], threshold: float) -> int:
+    regressions = 0
+    print(f"{'case':<40} {'calls/s':>10} {'errors':>7} {'p50 ms':>8} {'p99 ms':>8} {'p99.9 ms':>9} {'max ms':>8}")
+    for r in results:
+        if not r["calls"]:
+            print(f"{key(r):<40} {'no replies':>10}")
+            continue
+
+        print(f"{key(r):<40} {r['throughput']:>10.1f} {r['errors']:>7}", end="")
+        for name in ("latency", "corrected"):
+            lat = r[name]
+            if name == "corrected":
+                print(f"{'  corrected':<40} {'':>10} {'':>7}", end="")
+            print(f" {lat['p50'] * 1e3:>8.2f} {lat['p99'] * 1e3:>8.2f} {lat['p99.9'] * 1e3:>9.2f} {lat['max'] * 1e3:>8.2f}")
+
+        if baseline is None or key(r) not in baseline:
+            continue
+        base = baseline[key(r)]
+        throughput = r["throughput"] / base["throughput"] - 1
+        p99 = r["corrected"]["p99"] / base["p99"] - 1
+        line = f"{'  vs baseline':<40} {throughput:>+10.1%} {'':>7} {'':>8} {p99:>+8.1%}"
+        if throughput < -threshold or p99 > threshold:
+            line += " REGRESSION"
+            regressions += 1
+        print(line)
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generator and latency benchmark for cent.call")
+    parser.add_argument("-m", "--mode", choices=["closed", "open"], default="closed")
+    parser.add_argument("-f", "--func", choices=list(HANDLERS), default="echo")
+    parser.add_argument("-c", "--concurrency", type=int, action="append", help="Closed loop workers, default: 1")
+    parser.add_argument("-b", "--batch", type=int, action="append", help="Calls per message, default: 1")
+    parser.add_argument("-p", "--payload", type=int, action="append", help="Payload bytes per call, default: 64")
+    parser.add_argument("-r", "--rate", type=float, help="Messages/s; open loop schedule or closed loop target")
+    parser.add_argument("-d", "--duration", type=float, default=5.0, help="Seconds per case")
+    parser.add_argument("-w", "--warmup", type=float, default=1.0, help="Seconds before recording")
+    parser.add_argument("-n", "--clients", type=int, default=1, help="Client connections")
+    parser.add_argument("--server", choices=["sync", "async"], default="sync")
+    parser.add_argument("--workers", type=int, default=0, help="Server executor threads, 0 runs handlers inline")
+    parser.add_argument("--uri", help="Use a running repeater instead of starting one")
+    parser.add_argument("--port", type=int, default=10_100)
+    parser.add_argument("--no-server", action="store_true", help="Don't start a CallServer, one is already serving")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--save", help="Write throughput and p99 per case to a JSON file")
+    parser.add_argument("--compare", help="Compare against a file written with --save")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed change before flagging a regression")
+    args = parser.parse_args()
+
+    # NOTE: Repeater and server get their own process, so the client measured isn't fighting them for the GIL
+    if not args.no_server:
+        ready = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=serve, args=(args.uri, args.port, args.server, args.workers, ready), daemon=True
+        )
+        process.start()
+        ready.wait()
+        time.sleep(1)
+
+    uri = args.uri or f"ws://127.0.0.1:{args.port}"
+    clients = [CallClient(uri, CHANNEL, args.timeout, metrics=False) for _ in range(args.clients)]
+
+    results = [
+        bench(clients, args.mode, args.func, c, b, p, args.rate, args.duration, args.warmup)
+        for c in args.concurrency or [1]
+        for b in args.batch or [1]
+        for p in args.payload or [64]
+    ]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            cases = {key(r): {"throughput": r["throughput"], "p99": r["corrected"]["p99"]} for r in results if r["calls"]}
+            json.dump(cases, f, indent=2)
+
+    for client in clients:
+        client.root.stop()
+    sys.exit(1 if regressions else 0)
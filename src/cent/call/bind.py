@@ -0,0 +1,145 @@
+import inspect
+import types
+import typing as T
+
+UNIONS = (T.Union, getattr(types, "UnionType", T.Union))
+
+
+class InvalidArguments(TypeError):
+    pass
+
+
+def _coerce_int(x: T.Any) -> int:
+    if isinstance(x, float) and x.is_integer():
+        return int(x)
+    raise ValueError
+
+
+def _coerce_float(x: T.Any) -> float:
+    if isinstance(x, int) and not isinstance(x, bool):
+        return float(x)
+    raise ValueError
+
+
+def _coerce_bytes(x: T.Any) -> bytes:
+    if isinstance(x, (bytearray, memoryview)):
+        return bytes(x)
+    raise ValueError
+
+
+# NOTE: Only lossless conversions, anything else is rejected
+COERCE: T.Dict[type, T.Optional[T.Callable[[T.Any], T.Any]]] = {
+    bool: None,
+    int: _coerce_int,
+    float: _coerce_float,
+    str: None,
+    bytes: _coerce_bytes,
+    list: None,
+    dict: None,
+}
+
+
+def converter(name: str, hint: T.Any) -> T.Optional[T.Callable[[T.Any], T.Any]]:
+    optional = False
+    if T.get_origin(hint) in UNIONS:
+        options = [t for t in T.get_args(hint) if t is not type(None)]
+        optional = len(options) < len(T.get_args(hint))
+        if len(options) != 1:
+            return None
+        hint = options[0]
+
+    hint = T.get_origin(hint) or hint
+    if hint not in COERCE:
+        return None
+
+    coerce = COERCE[hint]
+    exact = (int,) if hint is int else (hint,)
+
+    def convert(x: T.Any) -> T.Any:
+        if (isinstance(x, exact) and not (hint is int and isinstance(x, bool))) or (x is None and optional):
+            return x
+        if coerce is not None:
+            try:
+                return coerce(x)
+            except ValueError:
+                pass
+        raise InvalidArguments(f"Argument {name!r} expected {hint.__name__}, got {type(x).__name__}")
+
+    return convert
+
+
+# NOTE: Inspects the signature once at register time and picks the cheapest `bind` for it, which only does set checks
+#       on the arg names, plus conversions for annotated args if `coerce` is set
+class Binder:
+    def __init__(self, f: T.Callable, coerce: bool = False) -> None:
+        self.name = getattr(f, "__name__", repr(f))
+        try:
+            params = list(inspect.signature(f).parameters.values())
+        except (TypeError, ValueError):  # NOTE: No signature (some builtins), args are passed through unchecked
+            params = [inspect.Parameter("kwargs", inspect.Parameter.VAR_KEYWORD)]
+
+        for param in params:
+            if param.kind == param.POSITIONAL_ONLY and param.default is param.empty:
+                raise ValueError(f"Can't bind positional-only argument {param.name!r} of {self.name}")
+
+        named = [p for p in params if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)]
+        self.names = frozenset(p.name for p in named)
+        self.required = frozenset(p.name for p in named if p.default is p.empty)
+        self.defaults = {p.name: p.default for p in named if p.default is not p.empty}
+        self.var_keyword = any(p.kind == p.VAR_KEYWORD for p in params)
+
+        self.converters: T.Dict[str, T.Callable[[T.Any], T.Any]] = {}
+        if coerce:
+            try:
+                hints = T.get_type_hints(f)
+            except Exception:
+                hints = {p.name: p.annotation for p in named if p.annotation is not p.empty}
+            for name in self.names:
+                convert = converter(name, hints[name]) if name in hints else None
+                if convert is not None:
+                    self.converters[name] = convert
+
+        if self.var_keyword and not self.required and not self.converters:
+            self.bind = self.passthrough
+        elif self.names == self.required and not self.var_keyword and not self.converters:
+            self.bind = self.exact
+
+    def passthrough(self, args: T.Dict) -> T.Dict:
+        return args
+
+    def exact(self, args: T.Dict) -> T.Dict:
+        if args.keys() != self.names:
+            self.check(args)
+        return args
+
+    def check(self, args: T.Dict) -> None:
+        keys = args.keys()
+        if not self.var_keyword and not keys <= self.names:
+            unexpected = ", ".join(sorted(map(str, keys - self.names)))
+            raise InvalidArguments(f"{self.name}() got unexpected arguments: {unexpected}")
+        if not self.required <= keys:
+            missing = ", ".join(sorted(self.required - keys))
+            raise InvalidArguments(f"{self.name}() missing arguments: {missing}")
+
+    def bind(self, args: T.Dict) -> T.Dict:
+        self.check(args)
+
+        if self.converters:
+            args = dict(args)
+            for name, convert in self.converters.items():
+                if name in args:
+                    args[name] = convert(args[name])
+
+        if self.defaults:
+            return {**self.defaults, **args}
+        return args
+
+    def bind_columns(self, columns: T.Dict[str, T.List]) -> T.Dict[str, T.List]:
+        self.check(columns)
+
+        if self.converters:
+            columns = dict(columns)
+            for name, convert in self.converters.items():
+                if name in columns:
+                    columns[name] = [convert(x) for x in columns[name]]
+        return columns
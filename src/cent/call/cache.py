@@ -0,0 +1,87 @@
+import threading
+import time
+import typing as T
+from collections import OrderedDict
+
+from cent.rhythm.unit import Seconds
+
+
+class CachePolicy:
+    def __init__(self, size: int = 1024, ttl: T.Optional[Seconds] = None, keys: T.Optional[T.Sequence[str]] = None) -> None:
+        self.size = size
+        self.ttl = ttl
+        self.keys = None if keys is None else tuple(sorted(keys))
+
+
+def freeze(x: T.Any) -> T.Hashable:
+    if isinstance(x, dict):
+        return (dict, tuple(sorted((freeze(k), freeze(v)) for k, v in x.items())))
+    if isinstance(x, (list, tuple)):
+        return (list, tuple(freeze(v) for v in x))
+    # NOTE: Type is part of the key, so 1, 1.0 and True don't share an entry
+    return (type(x), x)
+
+
+class ResultCache:
+    MISS = object()
+
+    def __init__(self, policy: CachePolicy) -> None:
+        self.policy = policy
+        self.store: T.OrderedDict[T.Hashable, T.Tuple[float, T.Any]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def key(self, args: T.Dict) -> T.Optional[T.Hashable]:
+        if self.policy.keys is not None:
+            args = {k: args[k] for k in self.policy.keys if k in args}
+        try:
+            key = freeze(args)
+            hash(key)
+        except TypeError:  # NOTE: Unhashable argument, not cached
+            return None
+        return key
+
+    def get(self, key: T.Hashable) -> T.Any:
+        with self.lock:
+            entry = self.store.get(key, None)
+            if entry is None:
+                self.misses += 1
+                return ResultCache.MISS
+
+            expires, ret = entry
+            if expires < time.monotonic():
+                del self.store[key]
+                self.expirations += 1
+                self.misses += 1
+                return ResultCache.MISS
+
+            self.store.move_to_end(key)
+            self.hits += 1
+            return ret
+
+    def put(self, key: T.Hashable, ret: T.Any) -> None:
+        ttl = self.policy.ttl
+        expires = float("inf") if ttl is None else time.monotonic() + ttl
+        with self.lock:
+            self.store[key] = (expires, ret)
+            self.store.move_to_end(key)
+            while len(self.store) > self.policy.size:
+                self.store.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self.lock:
+            self.store.clear()
+
+    def stats(self) -> T.Dict[str, int]:
+        return {
+            "size": len(self.store),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -1,47 +1,495 @@
+import asyncio
+import hashlib
+import heapq
+import inspect
+import json
+import threading
 import time
 import typing as T
+import weakref
+from collections import OrderedDict, deque
+from concurrent.futures import Executor, Future, InvalidStateError
+from types import AsyncGeneratorType, GeneratorType
 from uuid import uuid4
 
+from cent.call.bind import Binder, InvalidArguments
+from cent.call.cache import CachePolicy, ResultCache
+from cent.call.metrics import Metrics
+from cent.data.t import JSONx, PyO
+from cent.ether.device import LOOP_TIME, SLOW_LOOP_TIME
 from cent.ether.impl.simple import SimpleRoot
 from cent.ether.impl.ws_jsonx import ClientCom
 from cent.logging import Logger
-from cent.rhythm.timeout import Timeout
+from cent.rhythm.unit import Seconds
 
 log = Logger(__name__)
 
+STREAM_WINDOW = 16
+STREAM_TIMEOUT = 60
 
-class BoundSet:
-    def __init__(self, ttl: int, max_size: int) -> None:
+HEARTBEAT_INTERVAL = 1
+HEARTBEAT_TTL = 3.5 * HEARTBEAT_INTERVAL
+WARMUP_TIME = 0.25
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+LANE_WEIGHTS = (8, 4, 1)  # NOTE: Indexed by priority
+
+BALANCE_ROUND_ROBIN = "round_robin"
+BALANCE_LEAST_OUTSTANDING = "least_outstanding"
+
+
+def _done(value: T.Any) -> Future:
+    future: Future = Future()
+    future.set_result(value)
+    return future
+
+
+def _wire_default(x: T.Any) -> T.Any:
+    if isinstance(x, bytes):
+        return ["__jsonx__", "bytes", x.hex()]
+    return str(x)
+
+
+def _wire_size(x: T.Any) -> int:
+    # NOTE: Same length as the JSONx encoding for plain data, without building the Datum tree
+    return len(json.dumps(x, default=_wire_default))
+
+
+def _failed(exc: BaseException) -> Future:
+    future: Future = Future()
+    future.set_exception(exc)
+    return future
+
+
+def _map(f: T.Callable, vectorized: bool, columns: T.Dict[str, T.List]) -> T.Any:
+    # NOTE: Module level so a process pool only pickles the handler, never the Map and its executor
+    n = len(next(iter(columns.values()), []))
+
+    if vectorized:
+        ret = f(**columns)
+        if inspect.isawaitable(ret):
+            return CallServer.Map.resolve(ret, lambda ret: CallServer.Map.columns(ret, n))
+        return CallServer.Map.columns(ret, n)
+
+    rows = [f(**dict(zip(columns, row))) for row in zip(*columns.values())]
+    if rows and inspect.isawaitable(rows[0]):
+        return CallServer.Map.resolve(asyncio.gather(*rows), lambda rows: CallServer.Map.transpose(rows, n))
+    return CallServer.Map.transpose(rows, n)
+
+
+class ExpiringSet:
+    # NOTE: Keys are kept in the order they were last seen, so expired keys are always at the front
+    def __init__(self, ttl: Seconds, max_size: int) -> None:
         self.ttl = ttl
         self.max_size = max_size
-        self.cache = {}
-        self.n = 0
+        self.cache: T.OrderedDict[bytes, float] = OrderedDict()
 
     def check(self, key: bytes) -> bool:
-        if key not in self.cache:
-            self.cache[key] = time.monotonic()
-            self.n += 1
-            if self.n > self.max_size:
-                self.clean()
-            return False
-        else:
-            self.cache[key] = time.monotonic()
-            return True
+        now = time.monotonic()
+        self.expire(now)
+
+        found = key in self.cache
+        self.cache[key] = now
+        if found:
+            self.cache.move_to_end(key)
+        elif len(self.cache) > self.max_size:
+            self.cache.popitem(last=False)
+        return found
+
+    def expire(self, now: float) -> None:
+        cache = self.cache
+        while cache:
+            key, value = next(iter(cache.items()))
+            if now - value <= self.ttl:
+                return
+            del cache[key]
 
-    def clean(self) -> None:
-        keys = []
-        for key, value in self.cache.items():
-            if time.monotonic() - value > self.ttl:
-                keys.append(key)
-        for key in keys:
-            del self.cache[key]
-            self.n -= 1
+    def __len__(self) -> int:
+        return len(self.cache)
 
 
 class CallServer:
-    def __init__(self, service: str, server_uri: str, channel: bytes) -> None:
+    class DeadlineExceeded(Exception):
+        pass
+
+    class UnknownFunction(Exception):
+        pass
+
+    class Func:
+        def __init__(
+            self,
+            name: str,
+            f: T.Callable,
+            executor: T.Optional[Executor],
+            cache: T.Optional[CachePolicy] = None,
+            vectorized: bool = False,
+            limit: T.Optional[int] = None,
+            coerce: bool = False,
+        ) -> None:
+            self.name = name
+            self.f = f
+            self.binder = Binder(f, coerce)
+            self.bind = self.binder.bind
+            self.executor = executor
+            self.cache = None if cache is None else ResultCache(cache)
+            self.vectorized = vectorized
+            self.limit = limit
+
+    class Columns(list):
+        pass
+
+    class Rejected:
+        # NOTE: Stands in for a call that can't run (unknown func, args didn't bind), it fails in order with the rest
+        #       of the batch. Auto batched messages mix callers, one bad call must not drop the others.
+        def __init__(self, name: str, error: Exception) -> None:
+            self.name = name
+            self.executor = None
+            self.cache = None
+            self.limit = None
+            self.error = error
+
+        def f(self) -> T.NoReturn:
+            raise self.error
+
+    class Map:
+        # NOTE: Runs a Func over columnar args, either row by row or, if vectorized, with whole columns at once
+        def __init__(self, func: "CallServer.Func") -> None:
+            self.func = func
+            self.name = func.name
+            self.executor = None if inspect.iscoroutinefunction(func.f) else func.executor
+            self.cache = None
+            self.limit = func.limit
+
+        def bind(self, columns: T.Dict[str, T.List]) -> T.Dict[str, T.List]:
+            if self.func.vectorized:
+                self.func.binder.check(columns)
+                return columns
+            return self.func.binder.bind_columns(columns)
+
+        def f(self, **columns: T.List) -> T.Any:
+            return _map(self.func.f, self.func.vectorized, columns)
+
+        @staticmethod
+        async def resolve(ret: T.Awaitable, then: T.Callable) -> T.Any:
+            return then(await ret)
+
+        @staticmethod
+        def columns(ret: T.Any, n: int) -> "CallServer.Columns":
+            columns = CallServer.Columns(list(column) for column in (ret if isinstance(ret, tuple) else (ret,)))
+            if any(len(column) != n for column in columns):
+                raise ValueError(f"Expected {n} rows per result column")
+            return columns
+
+        @staticmethod
+        def transpose(rows: T.List, n: int) -> "CallServer.Columns":
+            rows = [row if isinstance(row, tuple) else (row,) for row in rows]
+            if any(len(row) != len(rows[0]) for row in rows):
+                raise ValueError("Rows returned a different number of values")
+            return CallServer.Columns(list(column) for column in zip(*rows)) if n else CallServer.Columns()
+
+    class Batch:
+        def __init__(
+            self, server: "CallServer", msg_id: bytes, no_ret: bool, calls: T.List[T.Tuple["CallServer.Func", T.Dict]]
+        ) -> None:
+            self.server = server
+            self.msg_id = msg_id
+            self.no_ret = no_ret
+            self.calls = calls
+            self.deadline: T.Optional[float] = None
+            self.priority = PRIORITY_NORMAL
+            self.received = time.perf_counter()
+            self.started: T.Optional[float] = None
+            self.rets: T.List[T.List] = []
+            self.streams: T.List[T.Tuple[int, T.Any]] = []
+            self.cache_key: T.Optional[T.Hashable] = None
+
+        def run(self) -> None:
+            # NOTE: Calls run one after another, the next one is submitted once the previous one is done
+            while len(self.rets) < len(self.calls):
+                func, args = self.calls[len(self.rets)]
+
+                if func.cache is not None and self.cached(func, args):
+                    continue
+
+                scheduler = self.server.scheduler
+                if not scheduler.acquire(func):
+                    scheduler.push(self, front=True)
+                    return
+
+                if func.executor is None:
+                    try:
+                        self.add_ret(True, self.invoke(func, args))
+                    except Exception as e:
+                        self.add_ret(False, e)
+                    finally:
+                        scheduler.release(func)
+                    continue
+
+                future = self.submit(func, args)
+                if not future.done():
+                    future.add_done_callback(self.done)
+                    return
+                scheduler.release(func)
+                self.add_future(future)
+
+            self.server.reply(self)
+
+        def next_func(self) -> T.Optional["CallServer.Func"]:
+            if len(self.rets) >= len(self.calls):
+                return None
+            return self.calls[len(self.rets)][0]
+
+        def begin(self, func: "CallServer.Func") -> None:
+            # NOTE: Checked right before running, so work that waited past its deadline in a queue is shed too
+            if self.deadline is not None and time.monotonic() > self.deadline:
+                raise CallServer.DeadlineExceeded(f"Deadline passed before {func.name} ran")
+            self.started = time.perf_counter()
+
+        def invoke(self, func: "CallServer.Func", args: T.Dict) -> T.Any:
+            self.begin(func)
+            return func.f(**args)
+
+        def submit(self, func: "CallServer.Func", args: T.Dict) -> Future:
+            # NOTE: Only the handler and its args go to the executor, so process pools can pickle them. A shut down or
+            #       broken pool fails the call like any other error instead of stalling the batch.
+            try:
+                self.begin(func)
+                if isinstance(func, CallServer.Map):
+                    return func.executor.submit(_map, func.func.f, func.func.vectorized, args)  # type: ignore
+                return func.executor.submit(func.f, **args)  # type: ignore
+            except Exception as e:
+                return _failed(e)
+
+        def done(self, future: Future) -> None:
+            # NOTE: Runs on the executor's thread, so only the result is kept here. The rest of the batch goes back to
+            #       the main loop, inline handlers and the reply never run on a pool worker or next to the loop.
+            self.server.scheduler.release(self.next_func())  # type: ignore
+            self.add_future(future)
+            self.server.scheduler.push(self, front=True)
+
+        def add_future(self, future: Future) -> None:
+            try:
+                self.add_ret(True, future.result())
+            except Exception as e:
+                self.add_ret(False, e)
+
+        def cached(self, func: "CallServer.Func", args: T.Dict) -> bool:
+            if func.cache is None:
+                return False
+
+            self.cache_key = func.cache.key(args)
+            if self.cache_key is None:
+                return False
+
+            ret = func.cache.get(self.cache_key)
+            if ret is ResultCache.MISS:
+                return False
+
+            self.cache_key = None
+            self.add_ret(True, ret)
+            return True
+
+        def add_ret(self, success: bool, ret: T.Any) -> None:
+            streamed = success and isinstance(ret, (GeneratorType, AsyncGeneratorType))
+
+            metrics = self.server.metrics
+            if metrics is not None:
+                name = self.calls[len(self.rets)][0].name
+                if self.started is None:  # NOTE: Cached or shed, never ran
+                    metrics.record(name, success)
+                else:
+                    metrics.record(name, success, queue=self.started - self.received, exec=time.perf_counter() - self.started)
+                self.started = None
+
+            if self.cache_key is not None:
+                if success and not streamed:
+                    func, _ = self.calls[len(self.rets)]
+                    func.cache.put(self.cache_key, ret)  # type: ignore
+                self.cache_key = None
+
+            if streamed:
+                self.streams.append((len(self.rets), ret))
+                self.rets.append([True, [], "stream"])
+                return
+
+            if success and isinstance(ret, CallServer.Columns):
+                self.rets.append([True, list(ret), "map"])
+                return
+
+            if not success:
+                ret = (ret.__class__.__name__, str(ret))
+            elif not isinstance(ret, tuple):
+                ret = (ret,)
+            self.rets.append([success, list(ret)])
+
+    class Stream:
+        def __init__(self, server: "CallServer", msg_id: bytes, idx: int, gen: T.Any) -> None:
+            self.server = server
+            self.msg_id = msg_id
+            self.idx = idx
+            self.gen = gen
+            self.credit = threading.Semaphore(STREAM_WINDOW)
+            self.thread = threading.Thread(target=self.pump, name="call_server|stream", daemon=True)
+
+        def start(self) -> None:
+            self.thread.start()
+
+        def ack(self, n: int) -> None:
+            for _ in range(min(n, STREAM_WINDOW)):
+                self.credit.release()
+
+        def items(self) -> T.Iterator:
+            if not inspect.isasyncgen(self.gen):
+                yield from self.gen
+                return
+
+            loop = asyncio.new_event_loop()
+            try:
+                while True:
+                    try:
+                        yield loop.run_until_complete(self.gen.__anext__())
+                    except StopAsyncIteration:
+                        return
+            finally:
+                loop.run_until_complete(self.gen.aclose())
+                loop.close()
+
+        def pump(self) -> None:
+            seq = 0
+            err = None
+            items = self.items()
+            try:
+                for item in items:
+                    if not self.credit.acquire(timeout=STREAM_TIMEOUT):
+                        err = ["TimeoutError", "Stream consumer stalled"]
+                        break
+                    self.send({"seq": seq, "item": list(item) if isinstance(item, tuple) else item})
+                    seq += 1
+            except Exception as e:
+                err = [e.__class__.__name__, str(e)]
+            finally:
+                items.close()
+                self.server.end_stream(self)
+
+            self.send({"seq": seq, "end": True, "err": err})
+
+        def send(self, fields: T.Dict) -> None:
+            self.server.root.send(self.server.channel, {"msg_id": self.msg_id, "idx": self.idx, **fields})
+
+    class Scheduler:
+        # NOTE: Smooth weighted round robin over the priority lanes. A batch whose next func is at its limit is skipped,
+        #       so a capped func only holds back its own callers.
+        def __init__(self, weights: T.Sequence[int] = LANE_WEIGHTS, concurrency: T.Optional[int] = None) -> None:
+            self.weights = list(weights)
+            self.concurrency = concurrency
+            self.lanes: T.List[T.Deque[CallServer.Batch]] = [deque() for _ in self.weights]
+            self.current = [0] * len(self.weights)
+            self.running: T.Dict[str, int] = {}
+            self.submitted = 0
+            self.cond = threading.Condition()
+
+        def push(self, batch: "CallServer.Batch", front: bool = False) -> None:
+            with self.cond:
+                if front:
+                    self.lanes[batch.priority].appendleft(batch)
+                else:
+                    self.lanes[batch.priority].append(batch)
+                self.cond.notify()
+
+        def pop(self, timeout: T.Optional[Seconds] = None) -> T.Optional["CallServer.Batch"]:
+            with self.cond:
+                while True:
+                    batch = self.take()
+                    if batch is not None or not self.cond.wait(timeout):
+                        return batch
+
+        def take(self) -> T.Optional["CallServer.Batch"]:
+            with self.cond:
+                best = None
+                total = 0
+                ready = {}
+                for lane, batches in enumerate(self.lanes):
+                    for idx, batch in enumerate(batches):
+                        if self.ready(batch.next_func()):
+                            ready[lane] = idx
+                            break
+                    else:
+                        continue
+
+                    self.current[lane] += self.weights[lane]
+                    total += self.weights[lane]
+                    if best is None or self.current[lane] > self.current[best]:
+                        best = lane
+
+                if best is None:
+                    return None
+
+                self.current[best] -= total
+                batch = self.lanes[best][ready[best]]
+                del self.lanes[best][ready[best]]
+                return batch
+
+        def ready(self, func: T.Optional["CallServer.Func"]) -> bool:
+            if func is None:
+                return True
+            if func.limit is not None and self.running.get(func.name, 0) >= func.limit:
+                return False
+            return func.executor is None or self.concurrency is None or self.submitted < self.concurrency
+
+        def tracked(self, func: "CallServer.Func") -> bool:
+            return func.limit is not None or (func.executor is not None and self.concurrency is not None)
+
+        def acquire(self, func: "CallServer.Func") -> bool:
+            if not self.tracked(func):
+                return True
+            with self.cond:
+                if not self.ready(func):
+                    return False
+                self.running[func.name] = self.running.get(func.name, 0) + 1
+                if func.executor is not None:
+                    self.submitted += 1
+                return True
+
+        def release(self, func: "CallServer.Func") -> None:
+            if not self.tracked(func):
+                return
+            with self.cond:
+                self.running[func.name] -= 1
+                if func.executor is not None:
+                    self.submitted -= 1
+                self.cond.notify()
+
+        def __len__(self) -> int:
+            return sum(len(lane) for lane in self.lanes)
+
+    def __init__(
+        self,
+        service: str,
+        server_uri: str,
+        channel: bytes,
+        executor: T.Optional[Executor] = None,
+        dedup_ttl: Seconds = 60 * 5,
+        dedup_size: int = 10_000,
+        lanes: T.Sequence[int] = LANE_WEIGHTS,
+        concurrency: T.Optional[int] = None,
+        metrics: bool = True,
+        reply_bytes: bool = False,
+    ) -> None:
         self.service = service
-        self.funcs = {}
+        self.metrics = Metrics() if metrics else None
+        self.reply_bytes = reply_bytes and metrics
+        self.funcs: T.Dict[str, CallServer.Func] = {}
+        self.executor = executor
+        self.scheduler = CallServer.Scheduler(lanes, concurrency)
+        self.msg_ids = ExpiringSet(ttl=dedup_ttl, max_size=dedup_size)
+        self.streams: T.Dict[T.Tuple[bytes, int], CallServer.Stream] = {}
+        self.lock = threading.Lock()
+
+        self.instance = uuid4().bytes
+        self.peers: T.Dict[bytes, float] = {}
+        self.inflight = 0
 
         self.channel = channel
         self.root = SimpleRoot()
@@ -51,72 +499,219 @@ class CallServer:
         self.com.start()
         self.root.start()
 
-    def register(self, name: str, f: T.Callable) -> None:
-        self.funcs[name] = f
+    def register(
+        self,
+        name: str,
+        f: T.Callable,
+        executor: T.Optional[Executor] = None,
+        cache: T.Optional[CachePolicy] = None,
+        vectorized: bool = False,
+        limit: T.Optional[int] = None,
+        coerce: bool = False,
+    ) -> None:
+        self.funcs[name] = CallServer.Func(name, f, executor or self.executor, cache, vectorized, limit, coerce)
         log.debug(f"Registered {name} for {self.service}")
 
-    def start(self) -> None:  # noqa: C901
-        msg_ids = BoundSet(ttl=60 * 5, max_size=10_00)
-        log.debug(f"Started call server for {self.service}")
+    def cache_stats(self) -> T.Dict[str, T.Dict[str, int]]:
+        return {name: func.cache.stats() for name, func in self.funcs.items() if func.cache is not None}
+
+    def start(self) -> None:
+        log.debug(f"Started call server for {self.service} | {self.instance.hex()}")
+        for msg in self.warmup():
+            self.handle(msg)
+
+        # NOTE: Receiving runs apart from the calls, so waiting messages are sorted into lanes instead of the socket
+        threading.Thread(target=self.receive, name="call_server|recv", daemon=True).start()
+        while True:
+            batch = self.scheduler.pop()
+            if batch is not None:
+                batch.run()
+
+    def receive(self) -> None:
         while True:
             _, msg = self.root.recv()
+            if self.route(msg):
+                continue
+            self.handle(msg)
+
+    def handle(self, msg: T.Dict) -> None:
+        try:
+            batch = self.parse(msg)
+        except (AssertionError, KeyError, TypeError, ValueError):
+            return
+
+        self.scheduler.push(batch)
+
+    def warmup(self) -> T.List[T.Dict]:
+        # NOTE: Learn the live peers before deciding which unaddressed calls are ours, calls meanwhile are kept
+        threading.Thread(target=self.heartbeat_loop, name="call_server|heartbeat", daemon=True).start()
+        self.heartbeat(hello=True)
+
+        backlog = []
+        deadline = time.monotonic() + WARMUP_TIME
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return backlog
             try:
-                msg_id = msg["msg_id"]
-                service = msg["service"]
-                no_ret = msg["no_ret"]
-                calls = msg["calls"]
+                _, msg = self.root.recv(timeout=remaining)
+            except TimeoutError:
+                return backlog
+            if not self.route(msg):
+                backlog.append(msg)
 
-                assert isinstance(msg_id, bytes), "Got invalid call_id; not bytes"
-                assert len(msg_id) == 16, "Got invalid call_id; invalid length"
-                assert not msg_ids.check(msg_id), "Got invalid call_id; duplicate"
+    def heartbeat_loop(self) -> None:
+        while self.root.active:
+            time.sleep(HEARTBEAT_INTERVAL)
+            self.heartbeat()
 
-                assert isinstance(service, str), "Got invalid service name; not str"
-                assert service == self.service, "Got invalid service name; mismatch"
+    def heartbeat(self, hello: bool = False) -> None:
+        msg = {"heartbeat": self.instance, "service": self.service, "load": self.inflight, "hello": hello}
+        self.root.send(self.channel, msg)
 
-                assert isinstance(no_ret, bool), "Got invalid no_ret; not bool"
+    def owns(self, msg_id: bytes, instance: T.Optional[bytes]) -> bool:
+        if instance is not None:
+            return instance == self.instance
 
-                assert isinstance(calls, list), ""
+        # NOTE: Rendezvous hashing, every instance with the same view of the peers picks the same owner
+        now = time.monotonic()
+        with self.lock:
+            for peer in [peer for peer, seen in self.peers.items() if now - seen > HEARTBEAT_TTL]:
+                del self.peers[peer]
+            peers = list(self.peers)
 
-                rets = []
-                for call in calls:
-                    func, args = call
+        owner = max(peers + [self.instance], key=lambda peer: hashlib.blake2b(peer + msg_id, digest_size=8).digest())
+        return owner == self.instance
 
-                    assert isinstance(func, str), "Got invalid func name; not str"
-                    assert func in self.funcs, "Got invalid func name; not registered"
-                    assert isinstance(args, dict), "Got invalid args; not dict"
+    def route(self, msg: T.Dict) -> bool:
+        if "heartbeat" in msg:
+            try:
+                if msg["service"] == self.service and isinstance(msg["heartbeat"], bytes) and len(msg["heartbeat"]) == 16:
+                    with self.lock:
+                        self.peers[msg["heartbeat"]] = time.monotonic()
+                    if msg["hello"] and msg["heartbeat"] != self.instance:
+                        self.heartbeat()
+            except KeyError:
+                pass
+            return True
 
-                    try:
-                        ret = self.funcs[func](**args)
-                        success = True
-                    except Exception as e:
-                        ret = (e.__class__.__name__, str(e))
-                        success = False
+        if "ack" in msg:
+            try:
+                with self.lock:
+                    stream = self.streams.get((msg["msg_id"], msg["idx"]), None)
+                if stream is not None:
+                    stream.ack(int(msg["ack"]))
+            except (KeyError, TypeError, ValueError):
+                pass
+            return True
 
-                    if not isinstance(ret, tuple):
-                        ret = (ret,)
+        return False
 
-                    if not no_ret:
-                        rets.append([success, list(ret)])
+    def parse(self, msg: T.Dict) -> "CallServer.Batch":
+        msg_id = msg["msg_id"]
+        service = msg["service"]
+        no_ret = msg["no_ret"]
+        calls = msg["calls"]
+        instance = msg.get("instance", None)
+        timeout = msg.get("timeout", None)
+        priority = msg.get("priority", PRIORITY_NORMAL)
 
-            except (AssertionError, KeyError, ValueError) as e:
-                continue
+        assert isinstance(msg_id, bytes), "Got invalid call_id; not bytes"
+        assert len(msg_id) == 16, "Got invalid call_id; invalid length"
+
+        assert isinstance(service, str), "Got invalid service name; not str"
+        assert service == self.service, "Got invalid service name; mismatch"
+
+        assert instance is None or isinstance(instance, bytes), "Got invalid instance; not bytes"
+        assert self.owns(msg_id, instance), "Got call for another instance"
+
+        assert not self.msg_ids.check(msg_id), "Got invalid call_id; duplicate"
+
+        assert isinstance(no_ret, bool), "Got invalid no_ret; not bool"
 
-            if no_ret:
+        assert timeout is None or isinstance(timeout, (int, float)), "Got invalid timeout; not a number"
+
+        assert isinstance(priority, int), "Got invalid priority; not int"
+        assert 0 <= priority < len(self.scheduler.lanes), "Got invalid priority; no such lane"
+
+        assert isinstance(calls, list), ""
+
+        funcs = []
+        for call in calls:
+            name, args, *mode = call
+
+            assert isinstance(name, str), "Got invalid func name; not str"
+            assert isinstance(args, dict), "Got invalid args; not dict"
+
+            func = self.funcs.get(name, None)
+            if func is None:
+                funcs.append((self.Rejected(name, CallServer.UnknownFunction(f"{name} is not registered")), {}))
                 continue
 
-            self.root.send(
-                self.channel,
-                {
-                    "msg_id": msg_id,
-                    "rets": rets,
-                },
-            )
+            if mode:
+                assert mode == ["map"], "Got invalid call mode"
+                assert all(isinstance(column, list) for column in args.values()), "Got invalid map args; not columns"
+                assert len({len(column) for column in args.values()}) <= 1, "Got invalid map args; uneven columns"
+                func = self.Map(func)  # type: ignore
+
+            try:
+                funcs.append((func, func.bind(args)))
+            except InvalidArguments as e:
+                funcs.append((self.Rejected(func.name, e), {}))  # type: ignore
+
+        batch = self.Batch(self, msg_id, no_ret, funcs)
+        if timeout is not None:
+            batch.deadline = time.monotonic() + timeout
+        batch.priority = priority
+
+        with self.lock:
+            self.inflight += 1
+        return batch
+
+    def reply(self, batch: "CallServer.Batch") -> None:
+        with self.lock:
+            self.inflight -= 1
+
+        if batch.no_ret:
+            for _, gen in batch.streams:
+                if inspect.isgenerator(gen):
+                    gen.close()
+            return
+
+        self.root.send(
+            self.channel,
+            {
+                "msg_id": batch.msg_id,
+                "rets": batch.rets,
+            },
+        )
+
+        if self.reply_bytes:
+            # NOTE: Opt-in, costs a second encode per ret. Plain JSONx size, interned frames come out smaller.
+            for (func, _), ret in zip(batch.calls, batch.rets):
+                self.metrics.observe(func.name, "reply_bytes", _wire_size(ret))  # type: ignore
+
+        for idx, gen in batch.streams:
+            self.start_stream(batch.msg_id, idx, gen)
+
+    def start_stream(self, msg_id: bytes, idx: int, gen: T.Any) -> None:
+        stream = self.Stream(self, msg_id, idx, gen)
+        with self.lock:
+            self.streams[(msg_id, idx)] = stream
+        stream.start()
+
+    def end_stream(self, stream: "CallServer.Stream") -> None:
+        with self.lock:
+            self.streams.pop((stream.msg_id, stream.idx), None)
 
 
 class CallClient:
     class Exception(Exception):
         pass
 
+    class Timeout(Exception, TimeoutError):
+        pass
+
     class Ret:
         def __init__(self, rets: T.Optional[T.List] = None) -> None:
             if rets:
@@ -128,9 +723,11 @@ class CallClient:
             if len(self.rets) == 0:
                 raise RuntimeError("No rets")
 
-            success, value = self.rets.pop(0)
+            success, value, *_ = self.rets.pop(0)
             if success:
                 return tuple(value)
+            elif value[0] == CallServer.DeadlineExceeded.__name__:
+                raise CallClient.Timeout(f"{value[0]} - {value[1]}")
             else:
                 raise CallClient.Exception(f"{value[0]} - {value[1]}")
 
@@ -140,8 +737,362 @@ class CallClient:
                 rets.append(self.capture())
             return rets
 
-    def __init__(self, server_uri: str, channel: bytes) -> None:
+    class Stream:
+        def __init__(self, dispatcher: "CallClient.Dispatcher", msg_id: bytes, idx: int) -> None:
+            self.dispatcher = dispatcher
+            self.msg_id = msg_id
+            self.idx = idx
+
+            self.cond = threading.Condition()
+            self.items: T.Dict[int, T.Any] = {}
+            self.seq = 0
+            self.unacked = 0
+            self.end: T.Optional[int] = None
+            self.err: T.Optional[T.List] = None
+            self.touched = time.monotonic()
+
+        def put(self, msg: T.Dict) -> None:
+            with self.cond:
+                self.touched = time.monotonic()
+                if msg.get("end", False):
+                    self.end = msg["seq"]
+                    self.err = msg.get("err", None)
+                else:
+                    self.items[msg["seq"]] = msg["item"]
+                self.cond.notify()
+
+        def __iter__(self) -> "CallClient.Stream":
+            return self
+
+        def __next__(self) -> T.Any:
+            with self.cond:
+                while self.seq not in self.items:
+                    if self.end is not None and self.seq >= self.end:
+                        self.close()
+                        if self.err:
+                            raise CallClient.Exception(f"{self.err[0]} - {self.err[1]}")
+                        raise StopIteration
+                    if not self.cond.wait(self.dispatcher.timeout):
+                        self.close()
+                        raise TimeoutError()
+
+                self.touched = time.monotonic()
+                item = self.items.pop(self.seq)
+                self.seq += 1
+                self.unacked += 1
+                ack = self.unacked
+                if ack >= STREAM_WINDOW // 2:
+                    self.unacked = 0
+
+            if ack >= STREAM_WINDOW // 2:
+                self.dispatcher.ack(self, ack)
+            return item
+
+        def close(self) -> None:
+            self.dispatcher.drop(self)
+
+    class Dispatcher:
+        # NOTE: Holds no reference to the client, so the client can still be collected (and stop the root)
+        def __init__(self, root: SimpleRoot, channel: bytes, timeout: Seconds, metrics: T.Optional[Metrics] = None) -> None:
+            self.root = root
+            self.channel = channel
+            self.timeout = timeout
+            self.metrics = metrics
+            self.sent: T.Dict[bytes, T.Tuple[float, T.List[str]]] = {}
+            self.pending: T.Dict[bytes, Future] = {}
+            self.streams: T.Dict[T.Tuple[bytes, int], CallClient.Stream] = {}
+            self.deadlines: T.List[T.Tuple[float, bytes]] = []
+            self.next_sweep = 0.0
+            self.lock = threading.Lock()
+            self.thread = threading.Thread(target=self.loop, name="call_client|dispatcher", daemon=True)
+
+            self.instances: T.Dict[str, T.Dict[bytes, T.List]] = {}  # NOTE: service -> instance -> [seen, load]
+            self.outstanding: T.Dict[bytes, int] = {}
+            self.routes: T.Dict[bytes, bytes] = {}
+            self.turns: T.Dict[str, int] = {}
+
+        def start(self) -> None:
+            self.thread.start()
+
+        def add(
+            self, msg_id: bytes, timeout: Seconds, instance: T.Optional[bytes] = None, names: T.Sequence[str] = ()
+        ) -> Future:
+            future: Future = Future()
+            with self.lock:
+                self.pending[msg_id] = future
+                if self.metrics is not None:
+                    self.sent[msg_id] = (time.perf_counter(), list(names))
+                heapq.heappush(self.deadlines, (time.monotonic() + timeout, msg_id))
+                if instance is not None:
+                    self.routes[msg_id] = instance
+                    self.outstanding[instance] = self.outstanding.get(instance, 0) + 1
+            return future
+
+        def release(self, msg_id: bytes, rets: T.Optional[T.List] = None) -> T.Optional[Future]:
+            sent = self.sent.pop(msg_id, None)
+            if sent is not None:
+                self.measure(sent, rets)
+
+            future = self.pending.pop(msg_id, None)
+            instance = self.routes.pop(msg_id, None)
+            if instance is not None:
+                self.outstanding[instance] -= 1
+                if not self.outstanding[instance]:
+                    del self.outstanding[instance]
+            return future
+
+        def measure(self, sent: T.Tuple[float, T.List[str]], rets: T.Optional[T.List]) -> None:
+            start, names = sent
+            rtt = time.perf_counter() - start
+            for idx, name in enumerate(names):
+                if rets is None:  # NOTE: Timed out
+                    self.metrics.record(name, False)  # type: ignore
+                else:
+                    self.metrics.record(name, idx < len(rets) and bool(rets[idx][0]), rtt=rtt)  # type: ignore
+
+        def pick(self, service: str, policy: str) -> T.Optional[bytes]:
+            now = time.monotonic()
+            with self.lock:
+                instances = self.instances.get(service, {})
+                for instance in [k for k, (seen, _) in instances.items() if now - seen > HEARTBEAT_TTL]:
+                    del instances[instance]
+                if not instances:
+                    return None
+
+                if policy == BALANCE_ROUND_ROBIN:
+                    turn = self.turns.get(service, 0)
+                    self.turns[service] = turn + 1
+                    live = sorted(instances)
+                    return live[turn % len(live)]
+
+                return min(instances, key=lambda k: (self.outstanding.get(k, 0), instances[k][1]))
+
+        def heartbeat(self, msg: T.Dict) -> None:
+            try:
+                instance, service, load = msg["heartbeat"], msg["service"], msg["load"]
+                assert isinstance(instance, bytes) and isinstance(service, str) and isinstance(load, int)
+            except (KeyError, AssertionError):
+                return
+
+            with self.lock:
+                self.instances.setdefault(service, {})[instance] = [time.monotonic(), load]
+
+        def loop(self) -> None:
+            while self.root.active:
+                try:
+                    _, msg = self.root.recv(timeout=LOOP_TIME)
+                except TimeoutError:
+                    pass
+                else:
+                    # NOTE: Any peer can put anything on the channel, a bad frame must not take the dispatcher down
+                    try:
+                        self.resolve(msg)
+                    except Exception as e:
+                        log.warning(f"Failed to resolve message; {e.__class__.__name__} - {e}")
+                self.expire()
+
+        def resolve(self, msg: T.Dict) -> None:
+            if "heartbeat" in msg:
+                self.heartbeat(msg)
+                return
+
+            try:
+                msg_id = msg["msg_id"]
+                assert isinstance(msg_id, bytes), "Invalid msg_id; not bytes"
+
+                if "idx" in msg and "seq" in msg:
+                    assert msg.get("end", False) or "item" in msg, "Invalid chunk; no item"
+                    stream = self.stream(msg_id, msg["idx"], create=False)
+                    if stream is not None:
+                        stream.put(msg)
+                    return
+
+                rets = msg["rets"]
+                assert isinstance(rets, list), "Invalid ret; not list"
+                assert all(isinstance(ret, list) for ret in rets), "Invalid ret; not list"
+            except (KeyError, TypeError, AssertionError):
+                return
+
+            with self.lock:
+                future = self.release(msg_id, rets)
+
+            if future is None:
+                log.debug("Invalid msg_id; not pending")
+                return
+
+            for idx, ret in enumerate(rets):
+                if len(ret) > 2 and ret[2] == "stream":
+                    rets[idx] = [True, [self.stream(msg_id, idx, create=True)]]
+
+            self.set(future, CallClient.Ret(rets))
+
+        def stream(self, msg_id: bytes, idx: int, create: bool) -> T.Optional["CallClient.Stream"]:
+            # NOTE: Every client sees every chunk on the channel, only streams of our own calls are buffered
+            with self.lock:
+                stream = self.streams.get((msg_id, idx), None)
+                if stream is None and (create or msg_id in self.pending):
+                    stream = self.streams[(msg_id, idx)] = CallClient.Stream(self, msg_id, idx)
+                return stream
+
+        def drop(self, stream: "CallClient.Stream") -> None:
+            with self.lock:
+                self.streams.pop((stream.msg_id, stream.idx), None)
+
+        def ack(self, stream: "CallClient.Stream", n: int) -> None:
+            self.root.send(self.channel, {"msg_id": stream.msg_id, "idx": stream.idx, "ack": n})
+
+        def expire(self) -> None:
+            now = time.monotonic()
+            if now >= self.next_sweep:
+                self.sweep(now)
+            if not self.deadlines or self.deadlines[0][0] > now:
+                return
+
+            expired = []
+            with self.lock:
+                while self.deadlines and self.deadlines[0][0] <= now:
+                    _, msg_id = heapq.heappop(self.deadlines)
+                    future = self.release(msg_id)
+                    if future is not None:
+                        expired.append(future)
+
+            for future in expired:
+                log.warning("Failed to receive message; timed out")
+                self.set(future, CallClient.Timeout("Timed out waiting for reply"))
+
+        def sweep(self, now: float) -> None:
+            # NOTE: Streams nobody iterates stop getting chunks once the server gives up on them, drop them after that
+            self.next_sweep = now + 1
+            idle = max(STREAM_TIMEOUT, self.timeout)
+            with self.lock:
+                for key in [key for key, stream in self.streams.items() if now - stream.touched > idle]:
+                    del self.streams[key]
+
+        @staticmethod
+        def set(future: Future, value: T.Any) -> None:
+            try:
+                if isinstance(value, BaseException):
+                    future.set_exception(value)
+                else:
+                    future.set_result(value)
+            except InvalidStateError:  # NOTE: Cancelled by the caller
+                pass
+
+    class Batcher:
+        class Batch:
+            def __init__(self, service: str, no_ret: bool, priority: T.Optional[int] = None) -> None:
+                self.service = service
+                self.no_ret = no_ret
+                self.priority = priority
+                self.calls: T.List[T.List] = []
+                self.futures: T.List[Future] = []
+                self.nbytes = 0
+                self.timeout: T.Optional[Seconds] = None
+                self.start_time = time.monotonic()
+
+            def add(self, func: str, args: T.Dict, future: Future, nbytes: int, timeout: T.Optional[Seconds]) -> None:
+                self.calls.append([func, args])
+                self.futures.append(future)
+                self.nbytes += nbytes
+                if timeout is not None:
+                    self.timeout = timeout if self.timeout is None else min(self.timeout, timeout)
+
+            def split(self, future: Future) -> None:
+                try:
+                    ret = future.result()
+                except Exception as e:
+                    for call_future in self.futures:
+                        CallClient.Dispatcher.set(call_future, e)
+                    return
+
+                for idx, call_future in enumerate(self.futures):
+                    CallClient.Dispatcher.set(call_future, CallClient.Ret(ret.rets[idx : idx + 1]))
+
+        def __init__(self, client: "CallClient", size: int, nbytes: T.Optional[int], linger: Seconds) -> None:
+            self.client_ref: weakref.ReferenceType[CallClient] = weakref.ref(client)
+            self.root = client.root
+            self.size = size
+            self.nbytes = nbytes
+            self.linger = linger
+
+            self.batches: T.Dict[T.Tuple[str, bool, T.Optional[int]], CallClient.Batcher.Batch] = {}
+            self.cond = threading.Condition()
+            self.thread = threading.Thread(target=self.loop, name="call_client|batcher", daemon=True)
+
+        def start(self) -> None:
+            self.thread.start()
+
+        def add(
+            self,
+            service: str,
+            func: str,
+            args: T.Dict,
+            no_ret: bool,
+            timeout: T.Optional[Seconds],
+            priority: T.Optional[int] = None,
+        ) -> Future:
+            future: Future = Future()
+            nbytes = len(JSONx.dump(PyO.load([func, args]))) if self.nbytes else 0
+
+            key = (service, no_ret, priority)
+            with self.cond:
+                batch = self.batches.get(key, None)
+                if batch is None:
+                    batch = self.batches[key] = CallClient.Batcher.Batch(service, no_ret, priority)
+                    self.cond.notify()
+
+                batch.add(func, args, future, nbytes, timeout)
+
+                full = len(batch.calls) >= self.size or (self.nbytes is not None and batch.nbytes >= self.nbytes)
+                if full:
+                    del self.batches[key]
+
+            if full:
+                self.flush(batch)
+            return future
+
+        def loop(self) -> None:
+            while self.root.active:
+                with self.cond:
+                    now = time.monotonic()
+                    due = [key for key, batch in self.batches.items() if now - batch.start_time >= self.linger]
+                    ready = [self.batches.pop(key) for key in due]
+                    if not ready:
+                        waits = [batch.start_time + self.linger - now for batch in self.batches.values()]
+                        self.cond.wait(min(waits) if waits else SLOW_LOOP_TIME)
+
+                for batch in ready:
+                    self.flush(batch)
+
+        def flush(self, batch: "CallClient.Batcher.Batch") -> None:
+            client = self.client_ref()
+            if client is None:
+                batch.split(_failed(RuntimeError("Client is gone")))
+                return
+
+            msg = {"msg_id": uuid4().bytes, "service": batch.service, "no_ret": batch.no_ret, "calls": batch.calls}
+            if batch.priority is not None:
+                msg["priority"] = batch.priority
+            client.send(msg, batch.timeout).add_done_callback(batch.split)
+
+    def __init__(
+        self,
+        server_uri: str,
+        channel: bytes,
+        timeout: Seconds = 5,
+        auto_batch: bool = False,
+        batch_size: int = 100,
+        batch_bytes: T.Optional[int] = None,
+        linger: Seconds = 0.002,
+        balance: T.Optional[str] = None,
+        metrics: bool = True,
+    ) -> None:
+        if balance not in (None, BALANCE_ROUND_ROBIN, BALANCE_LEAST_OUTSTANDING):
+            raise ValueError(f"Unknown balance policy: {balance}")
+
         self.channel = channel
+        self.timeout = timeout
+        self.balance = balance
         self.root = SimpleRoot()
         self.com = ClientCom(self.root, server_uri, channel)
 
@@ -149,12 +1100,34 @@ class CallClient:
         self.com.start()
         self.root.start()
 
+        self.metrics = Metrics() if metrics else None
+        self.dispatcher = CallClient.Dispatcher(self.root, channel, timeout, self.metrics)
+        self.dispatcher.start()
+
+        self.batcher: T.Optional[CallClient.Batcher] = None
+        if auto_batch:
+            self.batcher = CallClient.Batcher(self, batch_size, batch_bytes, linger)
+            self.batcher.start()
+
         self.buffered_msg = None
+        self.buffered_timeout: T.Optional[Seconds] = None
 
     def __del__(self) -> None:
         self.root.stop()
 
-    def call(self, service: str, func: str, args: T.Dict, no_ret: bool = False, buffer: bool = False) -> "CallClient.Ret":
+    def call(
+        self,
+        service: str,
+        func: str,
+        args: T.Dict,
+        no_ret: bool = False,
+        buffer: bool = False,
+        timeout: T.Optional[Seconds] = None,
+        priority: T.Optional[int] = None,
+    ) -> "CallClient.Ret":
+        if self.batcher is not None and not buffer and self.buffered_msg is None:
+            return self.submit(service, func, args, no_ret, timeout, priority).result()
+
         msg_id = uuid4().bytes
         if self.buffered_msg is None:
             self.buffered_msg = {"msg_id": msg_id, "service": service, "no_ret": no_ret, "calls": []}
@@ -164,40 +1137,90 @@ class CallClient:
             self.buffered_msg["no_ret"] = no_ret
 
         self.buffered_msg["calls"].append([func, args])
+        if timeout is not None:
+            self.buffered_timeout = timeout if self.buffered_timeout is None else min(self.buffered_timeout, timeout)
+        if priority is not None:
+            self.buffered_msg["priority"] = min(self.buffered_msg.get("priority", priority), priority)
 
         if buffer:
             return CallClient.Ret()
         else:
             return self.exec()
 
-    def exec(self) -> "CallClient.Ret":
-        msg = self.buffered_msg
-        self.buffered_msg = None
-        while True:
-            if msg is None:
-                return CallClient.Ret()
+    def submit(
+        self,
+        service: str,
+        func: str,
+        args: T.Dict,
+        no_ret: bool = False,
+        timeout: T.Optional[Seconds] = None,
+        priority: T.Optional[int] = None,
+    ) -> Future:
+        if self.batcher is not None:
+            return self.batcher.add(service, func, args, no_ret, timeout, priority)
 
-            self.root.send(self.channel, msg)
+        msg = {"msg_id": uuid4().bytes, "service": service, "no_ret": no_ret, "calls": [[func, args]]}
+        if priority is not None:
+            msg["priority"] = priority
+        return self.send(msg, timeout)
 
-            if msg["no_ret"]:
-                return CallClient.Ret([(True, ())] * len(msg["calls"]))
+    def call_map(
+        self,
+        service: str,
+        func: str,
+        columns: T.Dict[str, T.List],
+        no_ret: bool = False,
+        timeout: T.Optional[Seconds] = None,
+        priority: T.Optional[int] = None,
+    ) -> "CallClient.Ret":
+        return self.submit_map(service, func, columns, no_ret, timeout, priority).result()
 
-            timeout = Timeout(5)
-            while not timeout:
-                try:
-                    _, ret_msg = self.root.recv(timeout=1)
+    def submit_map(
+        self,
+        service: str,
+        func: str,
+        columns: T.Dict[str, T.List],
+        no_ret: bool = False,
+        timeout: T.Optional[Seconds] = None,
+        priority: T.Optional[int] = None,
+    ) -> Future:
+        if len({len(column) for column in columns.values()}) > 1:
+            raise ValueError("Columns have different lengths")
 
-                    msg_id = ret_msg["msg_id"]
-                    rets = ret_msg["rets"]
+        columns = {key: list(column) for key, column in columns.items()}
+        msg = {"msg_id": uuid4().bytes, "service": service, "no_ret": no_ret, "calls": [[func, columns, "map"]]}
+        if priority is not None:
+            msg["priority"] = priority
+        return self.send(msg, timeout)
 
-                    assert isinstance(msg_id, bytes), "Invalid msg_id; not bytes"
-                    assert msg["msg_id"] == msg_id, "Invalid msg_id; mismatch"
+    def flush(self, timeout: T.Optional[Seconds] = None) -> Future:
+        msg = self.buffered_msg
+        if timeout is None:
+            timeout = self.buffered_timeout
+        self.buffered_msg = None
+        self.buffered_timeout = None
+        if msg is None:
+            return _done(CallClient.Ret())
+        return self.send(msg, timeout)
 
-                    assert isinstance(rets, list), "Invalid ret; not list"
+    def exec(self, timeout: T.Optional[Seconds] = None) -> "CallClient.Ret":
+        return self.flush(timeout).result()
 
-                    return CallClient.Ret(rets)
+    def send(self, msg: T.Dict, timeout: T.Optional[Seconds] = None) -> Future:
+        # NOTE: Without a known instance the call goes out unaddressed and the servers agree on an owner themselves
+        instance = None if self.balance is None else self.dispatcher.pick(msg["service"], self.balance)
+        if instance is not None:
+            msg["instance"] = instance
 
-                except (KeyError, AssertionError):
-                    log.debug("Invalid msg")
-                except TimeoutError:
-                    log.warning("Failed to receive message; timed out")
+        # NOTE: Relative, the server turns it into a deadline on its own clock when the message arrives
+        timeout = self.timeout if timeout is None else timeout
+        msg["timeout"] = timeout
+
+        if msg["no_ret"]:
+            future = _done(CallClient.Ret([(True, ())] * len(msg["calls"])))
+        else:
+            names = [f"{msg['service']}.{call[0]}" for call in msg["calls"]] if self.metrics is not None else []
+            future = self.dispatcher.add(msg["msg_id"], timeout, instance, names)
+
+        self.root.send(self.channel, msg)
+        return future
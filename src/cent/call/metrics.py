@@ -0,0 +1,69 @@
+import threading
+import typing as T
+
+from cent.rhythm.histogram import Histogram
+from cent.rhythm.unit import Seconds
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.histograms: T.Dict[str, Histogram] = {}
+
+    def snapshot(self) -> T.Dict[str, T.Any]:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            **{key: histogram.snapshot() for key, histogram in self.histograms.items()},
+        }
+
+
+class Metrics:
+    def __init__(self) -> None:
+        self.stats: T.Dict[str, Stats] = {}
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def record(self, name: str, success: bool, **values: float) -> None:
+        with self.lock:
+            stats = self.get(name)
+            stats.calls += 1
+            if not success:
+                stats.errors += 1
+            for key, value in values.items():
+                self.histogram(stats, key).record(value)
+
+    def observe(self, name: str, key: str, value: float) -> None:
+        with self.lock:
+            self.histogram(self.get(name), key).record(value)
+
+    def get(self, name: str) -> Stats:
+        stats = self.stats.get(name, None)
+        if stats is None:
+            stats = self.stats[name] = Stats()
+        return stats
+
+    @staticmethod
+    def histogram(stats: Stats, key: str) -> Histogram:
+        histogram = stats.histograms.get(key, None)
+        if histogram is None:
+            histogram = stats.histograms[key] = Histogram()
+        return histogram
+
+    def snapshot(self, reset: bool = False) -> T.Dict[str, T.Dict[str, T.Any]]:
+        with self.lock:
+            snapshot = {name: stats.snapshot() for name, stats in self.stats.items()}
+            if reset:
+                self.stats = {}
+        return snapshot
+
+    def export(self, hook: T.Callable[[T.Dict], None], interval: Seconds = 10, reset: bool = False) -> None:
+        def loop() -> None:
+            while not self.stopped.wait(interval):
+                hook(self.snapshot(reset))
+
+        threading.Thread(target=loop, name="call_metrics|export", daemon=True).start()
+
+    def stop(self) -> None:
+        self.stopped.set()
@@ -0,0 +1,91 @@
+import queue
+import time
+import typing as T
+
+import pytest
+
+from cent.call import call
+from cent.call.call import CallServer
+
+
+# NOTE: Stands in for CallServer/AsyncCallServer, batches only need these attributes of their server
+class Server:
+    def __init__(self) -> None:
+        self.replies: T.List[T.Tuple[bytes, T.List]] = []
+        self.metrics = None
+        self.scheduler = CallServer.Scheduler()
+
+    def reply(self, batch: CallServer.Batch) -> None:
+        self.replies.append((batch.msg_id, batch.rets))
+
+    def func_limit(self, func: CallServer.Func) -> None:
+        return None
+
+    # NOTE: Plays CallServer.start's loop until the given batches replied, batches waiting on an executor come back here
+    def serve(self, *batches: CallServer.Batch, timeout: float = 5) -> None:
+        expected = len(self.replies) + len(batches)
+        for batch in batches:
+            self.scheduler.push(batch)
+
+        deadline = time.monotonic() + timeout
+        while len(self.replies) < expected and time.monotonic() < deadline:
+            batch = self.scheduler.pop(0.01)
+            if batch is not None:
+                batch.run()
+
+
+@pytest.fixture
+def server() -> Server:
+    return Server()
+
+
+# NOTE: In-memory channel, every root sees every message like on a ws_jsonx server
+class Ether:
+    def __init__(self) -> None:
+        self.roots: T.List[Root] = []
+
+
+class Root:
+    def __init__(self, ether: Ether) -> None:
+        self.active = False
+        self.inbox: queue.Queue = queue.Queue()
+        ether.roots.append(self)
+        self.ether = ether
+
+    def add_com(self, com: T.Any) -> None:
+        pass
+
+    def start(self) -> None:
+        self.active = True
+
+    def stop(self) -> None:
+        self.active = False
+
+    def send(self, channel: bytes, msg: T.Dict) -> None:
+        for root in self.ether.roots:
+            root.inbox.put((channel, msg))
+
+    def recv(self, timeout: T.Optional[float] = None) -> T.Tuple[bytes, T.Dict]:
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+
+class Com:
+    def __init__(self, parent: Root, uri: str, channel: bytes) -> None:
+        pass
+
+    def start(self) -> None:
+        pass
+
+
+# NOTE: Real CallServers and CallClients built while this is active talk over one Ether instead of a server
+@pytest.fixture
+def ether(monkeypatch: pytest.MonkeyPatch) -> T.Iterator[Ether]:
+    ether = Ether()
+    monkeypatch.setattr(call, "SimpleRoot", lambda: Root(ether))
+    monkeypatch.setattr(call, "ClientCom", Com)
+    yield ether
+    for root in ether.roots:
+        root.stop()
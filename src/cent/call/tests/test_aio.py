@@ -0,0 +1,81 @@
+import asyncio
+import queue
+import time
+
+import pytest
+
+from cent.call.aio import AsyncCallClient, AsyncCallServer
+from cent.call.call import CallClient, CallServer
+
+
+async def wait(x):
+    await asyncio.sleep(0.1)
+    return x
+
+
+def test_async_and_plain_handlers_overlap(server):
+    calls = [(CallServer.Func("wait", wait, None), {"x": 1}), (CallServer.Func("plain", lambda: (2, 3), None), {})]
+    batches = [AsyncCallServer.Batch(server, bytes([i]), False, calls) for i in range(50)]  # type: ignore
+
+    async def main():
+        await asyncio.gather(*(batch.run_async() for batch in batches))
+
+    start = time.monotonic()
+    asyncio.run(main())
+    assert time.monotonic() - start < 1
+    assert server.replies[0][1] == [[True, [1]], [True, [2, 3]]]
+    assert len(server.replies) == 50
+
+
+# NOTE: Echoes "echo" calls back through the dispatcher's own loop, never answers anything else
+class Root:
+    def __init__(self) -> None:
+        self.active = True
+        self.inbox: queue.Queue = queue.Queue()
+
+    def send(self, channel, msg) -> None:
+        if msg["calls"][0][0] == "echo":
+            self.inbox.put((channel, {"msg_id": msg["msg_id"], "rets": [[True, [msg["calls"][0][1]["x"]]]]}))
+
+    def recv(self, timeout: float):
+        try:
+            return self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+    def stop(self) -> None:
+        self.active = False
+
+
+def make_client() -> AsyncCallClient:
+    client = CallClient.__new__(CallClient)
+    client.root = Root()  # type: ignore
+    client.channel = b""
+    client.timeout = 5
+    client.balance = None
+    client.metrics = None
+    client.batcher = None
+    client.dispatcher = CallClient.Dispatcher(client.root, b"", client.timeout)  # type: ignore
+    client.dispatcher.start()
+
+    async_client = AsyncCallClient.__new__(AsyncCallClient)
+    async_client.client = client
+    async_client.metrics = None
+    return async_client
+
+
+def test_async_client_gathers_and_times_out():
+    client = make_client()
+
+    async def main():
+        rets = await asyncio.gather(*(client.call("svc", "echo", {"x": i}) for i in range(100)))
+        assert [ret.capture() for ret in rets] == [(i,) for i in range(100)]
+
+        with pytest.raises(TimeoutError):
+            await client.call("svc", "hang", {}, timeout=0.05)
+
+    try:
+        asyncio.run(main())
+        assert client.client.dispatcher.pending == {}
+    finally:
+        client.client.root.stop()
@@ -0,0 +1,49 @@
+import typing as T
+
+import pytest
+
+from cent.call.bind import Binder, InvalidArguments
+from cent.call.call import CallServer
+
+
+def f(a: int, b: float = 1.0, *, c: T.Optional[bytes] = None) -> None:
+    pass
+
+
+def test_bind_checks_names_and_applies_defaults():
+    binder = Binder(f)
+    assert binder.bind({"a": 1}) == {"a": 1, "b": 1.0, "c": None}
+
+    with pytest.raises(InvalidArguments, match="unexpected arguments: d"):
+        binder.bind({"a": 1, "d": 2})
+    with pytest.raises(InvalidArguments, match="missing arguments: a"):
+        binder.bind({"b": 2.0})
+
+    assert Binder(lambda **kw: None).bind({"x": 1}) == {"x": 1}
+    assert Binder(lambda x: None).bind({"x": 1}) == {"x": 1}
+
+
+def test_bind_coerces_losslessly():
+    binder = Binder(f, coerce=True)
+    assert binder.bind({"a": 2.0, "b": 3, "c": bytearray(b"x")}) == {"a": 2, "b": 3.0, "c": b"x"}
+
+    for bad in ({"a": 2.5}, {"a": True}, {"a": "2"}, {"a": 1, "b": "x"}):
+        with pytest.raises(InvalidArguments):
+            binder.bind(bad)
+
+
+def test_rejected_call_fails_in_place(server):
+    ran = []
+    func = CallServer.Func("f", lambda x: ran.append(x), None)
+
+    calls = []
+    for args in ({"x": 1}, {"y": 2}, {"x": 3}):
+        try:
+            calls.append((func, func.bind(args)))
+        except InvalidArguments as e:
+            calls.append((CallServer.Rejected(func.name, e), {}))  # type: ignore
+
+    CallServer.Batch(server, b"a", False, calls).run()  # type: ignore
+    assert ran == [1, 3]
+    _, rets = server.replies[0]
+    assert rets[1][0] is False and rets[1][1][0] == "InvalidArguments"
@@ -0,0 +1,38 @@
+import time
+
+from cent.call.cache import CachePolicy, ResultCache
+from cent.call.call import CallServer
+
+
+def test_cache_skips_handler(server):
+    calls = []
+
+    def lookup(key, trace=None):
+        calls.append(key)
+        return key * 2
+
+    func = CallServer.Func("lookup", lookup, None, CachePolicy(size=2, keys=["key"]))
+    args = [{"key": 1}, {"key": 1, "trace": "a"}, {"key": 2}, {"key": 3}, {"key": 1}, {"key": True}]
+    CallServer.Batch(server, b"a", False, [(func, a) for a in args]).run()  # type: ignore
+
+    assert server.replies == [(b"a", [[True, [2]], [True, [2]], [True, [4]], [True, [6]], [True, [2]], [True, [2]]])]
+    assert calls == [1, 2, 3, 1, True]
+    assert func.cache.stats() == {"size": 2, "hits": 1, "misses": 5, "evictions": 3, "expirations": 0}  # type: ignore
+
+
+def test_ttl_and_errors_not_cached(server):
+    cache = ResultCache(CachePolicy(ttl=0.01))
+    key = cache.key({"a": [1, {"b": b"x"}]})
+    cache.put(key, 1)
+    assert cache.get(key) == 1
+    time.sleep(0.02)
+    assert cache.get(key) is ResultCache.MISS
+    assert cache.key({"a": object()}) is not None
+    assert cache.key({"a": {1: [set()]}}) is None
+
+    def fail():
+        raise ValueError
+
+    func = CallServer.Func("fail", fail, None, CachePolicy())
+    CallServer.Batch(server, b"a", False, [(func, {}), (func, {})]).run()  # type: ignore
+    assert func.cache.stats()["misses"] == 2  # type: ignore
@@ -0,0 +1,184 @@
+import queue
+import time
+from concurrent.futures import Future
+
+import pytest
+
+from cent.call.call import STREAM_TIMEOUT, CallClient
+
+
+def test_dispatcher_matches_replies_out_of_order():
+    dispatcher = CallClient.Dispatcher(None, b"", 5)  # type: ignore
+    a = dispatcher.add(b"a" * 16, 5)
+    b = dispatcher.add(b"b" * 16, 5)
+
+    dispatcher.resolve({"msg_id": b"b" * 16, "rets": [[True, [2]]]})
+    dispatcher.resolve({"msg_id": b"c" * 16, "rets": [[True, [3]]]})
+    dispatcher.resolve({"msg_id": b"a" * 16, "service": "_", "no_ret": False, "calls": []})
+    assert b.result(0).all() == [(2,)]
+    assert not a.done()
+
+    dispatcher.resolve({"msg_id": b"a" * 16, "rets": [[False, ["ValueError", "x"]]]})
+    with pytest.raises(CallClient.Exception):
+        a.result(0).capture()
+    assert dispatcher.pending == {}
+
+
+def test_dispatcher_expires():
+    dispatcher = CallClient.Dispatcher(None, b"", 5)  # type: ignore
+    future = dispatcher.add(b"a" * 16, 0)
+    time.sleep(0.001)
+    dispatcher.expire()
+    with pytest.raises(TimeoutError):
+        future.result(0)
+    assert dispatcher.pending == {}
+
+
+def test_batch_split():
+    batch = CallClient.Batcher.Batch("_", False)
+    futures = [Future() for _ in range(3)]
+    for i, future in enumerate(futures):
+        batch.add("f", {"x": i}, future, 0, None if i else 1)
+    assert batch.timeout == 1
+
+    reply: Future = Future()
+    reply.set_result(CallClient.Ret([[True, [0]], [False, ["E", "e"]], [True, [2]]]))
+    batch.split(reply)
+
+    assert futures[0].result(0).capture() == (0,)
+    with pytest.raises(CallClient.Exception):
+        futures[1].result(0).capture()
+    assert futures[2].result(0).capture() == (2,)
+
+
+class Root:
+    def __init__(self) -> None:
+        self.sent = []
+        self.active = True
+        self.inbox: queue.Queue = queue.Queue()
+
+    def send(self, channel, msg) -> None:
+        self.sent.append(msg)
+
+    def recv(self, timeout: float):
+        try:
+            return b"", self.inbox.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+
+# NOTE: Replies to every batched call with its own x
+class Client:
+    def __init__(self) -> None:
+        self.root = Root()
+        self.msgs = []
+
+    def send(self, msg, timeout=None) -> Future:
+        self.msgs.append(msg)
+        future: Future = Future()
+        future.set_result(CallClient.Ret([[True, [args["x"]]] for _, args in msg["calls"]]))
+        return future
+
+
+def test_batcher_flushes_on_size_and_bytes():
+    client = Client()
+    batcher = CallClient.Batcher(client, 3, None, 10)  # type: ignore
+    futures = [batcher.add("svc", "f", {"x": i}, False, None) for i in range(4)]
+    assert [len(msg["calls"]) for msg in client.msgs] == [3]
+    assert [future.result(0).capture() for future in futures[:3]] == [(0,), (1,), (2,)]
+    assert not futures[3].done()
+
+    client = Client()
+    batcher = CallClient.Batcher(client, 100, 50, 10)  # type: ignore
+    batcher.add("svc", "f", {"x": "a" * 20}, False, None)
+    assert client.msgs == []
+    batcher.add("other", "f", {"x": "b" * 20}, False, None)
+    assert client.msgs == []
+    future = batcher.add("svc", "f", {"x": "c" * 20}, False, None)
+    assert [msg["service"] for msg in client.msgs] == ["svc"] and len(client.msgs[0]["calls"]) == 2
+    assert future.result(0).capture() == ("c" * 20,)
+
+
+def test_batcher_flushes_after_linger():
+    client = Client()
+    client.root.active = True
+    batcher = CallClient.Batcher(client, 100, None, 0.01)  # type: ignore
+    batcher.start()
+    try:
+        start = time.monotonic()
+        futures = [batcher.add("svc", "f", {"x": i}, False, None) for i in range(2)]
+        assert [future.result(1).capture() for future in futures] == [(0,), (1,)]
+        assert time.monotonic() - start >= 0.01
+        assert [len(msg["calls"]) for msg in client.msgs] == [2]
+    finally:
+        client.root.active = False
+
+
+def test_stream_orders_items_and_acks():
+    root = Root()
+    dispatcher = CallClient.Dispatcher(root, b"", 1)  # type: ignore
+    future = dispatcher.add(b"a" * 16, 5)
+
+    n = 20
+    for seq in reversed(range(n)):
+        dispatcher.resolve({"msg_id": b"a" * 16, "idx": 1, "seq": seq, "item": seq})
+    dispatcher.resolve({"msg_id": b"a" * 16, "idx": 1, "seq": n, "end": True, "err": None})
+    dispatcher.resolve({"msg_id": b"a" * 16, "rets": [[True, [0]], [True, [], "stream"]]})
+
+    ret = future.result(0)
+    assert ret.capture() == (0,)
+    (stream,) = ret.capture()
+    assert list(stream) == list(range(n))
+    assert root.sent == [{"msg_id": b"a" * 16, "idx": 1, "ack": 8}, {"msg_id": b"a" * 16, "idx": 1, "ack": 8}]
+    assert dispatcher.streams == {}
+
+
+def test_dispatcher_picks_instances():
+    dispatcher = CallClient.Dispatcher(None, b"", 5)  # type: ignore
+    assert dispatcher.pick("svc", "round_robin") is None
+
+    a, b = b"a" * 16, b"b" * 16
+    dispatcher.resolve({"heartbeat": a, "service": "svc", "load": 0, "hello": False})
+    dispatcher.resolve({"heartbeat": b, "service": "svc", "load": 3, "hello": False})
+    assert [dispatcher.pick("svc", "round_robin") for _ in range(4)] == [a, b, a, b]
+
+    assert dispatcher.pick("svc", "least_outstanding") == a
+    dispatcher.add(b"1" * 16, 5, a)
+    assert dispatcher.pick("svc", "least_outstanding") == b
+    dispatcher.resolve({"msg_id": b"1" * 16, "rets": []})
+    assert dispatcher.pick("svc", "least_outstanding") == a
+    assert dispatcher.outstanding == {}
+
+
+def test_stream_ignores_other_clients_and_drops_idle():
+    root = Root()
+    dispatcher = CallClient.Dispatcher(root, b"", 0.01)  # type: ignore
+    dispatcher.resolve({"msg_id": b"x" * 16, "idx": 0, "seq": 0, "item": 1})
+    assert dispatcher.streams == {}
+
+    future = dispatcher.add(b"a" * 16, 5)
+    dispatcher.resolve({"msg_id": b"a" * 16, "rets": [[True, [], "stream"], [True, [], "stream"]]})
+    first, second = [ret[1][0] for ret in future.result(0).rets]
+    with pytest.raises(TimeoutError):
+        next(first)
+    assert list(dispatcher.streams) == [(b"a" * 16, 1)]
+
+    dispatcher.sweep(second.touched + STREAM_TIMEOUT + 1)
+    assert dispatcher.streams == {}
+
+
+def test_dispatcher_survives_malformed_frames():
+    root = Root()
+    dispatcher = CallClient.Dispatcher(root, b"", 5)  # type: ignore
+    future = dispatcher.add(b"a" * 16, 5)
+    dispatcher.add(b"b" * 16, 5)
+    dispatcher.start()
+
+    root.inbox.put({"msg_id": b"a" * 16, "rets": [5]})
+    root.inbox.put({"msg_id": b"b" * 16, "idx": 0, "seq": 0})
+    root.inbox.put({"msg_id": b"b" * 16, "idx": 0, "seq": [], "item": 1})
+    root.inbox.put({"msg_id": b"a" * 16, "rets": [[True, [1]]]})
+    try:
+        assert future.result(1).capture() == (1,)
+    finally:
+        root.active = False
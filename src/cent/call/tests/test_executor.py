@@ -0,0 +1,107 @@
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+
+from cent.call.bench import echo
+from cent.call.call import CallClient, CallServer
+
+
+def test_batch_keeps_order_across_executors(server):
+    order = []
+
+    def slow(x):
+        time.sleep(0.05)
+        order.append(x)
+        return x
+
+    def fail():
+        raise ValueError("nope")
+
+    def inline(x):
+        threads.append(threading.current_thread())
+        return x, x
+
+    threads = []
+    with ThreadPoolExecutor(4) as pool:
+        calls = [
+            (CallServer.Func("slow", slow, pool), {"x": 1}),
+            (CallServer.Func("inline", inline, None), {"x": 2}),
+            (CallServer.Func("fail", fail, pool), {}),
+            (CallServer.Func("slow", slow, pool), {"x": 3}),
+        ]
+        server.serve(CallServer.Batch(server, b"a", False, calls))  # type: ignore
+
+    assert order == [1, 3]
+    assert threads == [threading.current_thread()]
+    assert server.replies == [(b"a", [[True, [1]], [True, [2, 2]], [False, ["ValueError", "nope"]], [True, [3]]])]
+
+
+def test_batches_overlap_on_pool(server):
+    with ThreadPoolExecutor(8) as pool:
+        func = CallServer.Func("sleep", lambda: time.sleep(0.1), pool)
+        start = time.monotonic()
+        server.serve(*(CallServer.Batch(server, bytes([i]), False, [(func, {})]) for i in range(8)))  # type: ignore
+    assert time.monotonic() - start < 0.5
+    assert len(server.replies) == 8
+
+
+def test_batch_sheds_calls_past_deadline(server):
+    ran = []
+
+    def slow(x):
+        time.sleep(0.05)
+        ran.append(x)
+        return x
+
+    with ThreadPoolExecutor(1) as pool:
+        calls = [(CallServer.Func("slow", slow, pool), {"x": x}) for x in range(3)]
+        batch = CallServer.Batch(server, b"a", False, calls)  # type: ignore
+        batch.deadline = time.monotonic() + 0.03
+        server.serve(batch)
+
+    assert ran == [0]
+    _, rets = server.replies[0]
+    assert rets[0] == [True, [0]]
+    assert rets[1][1][0] == rets[2][1][0] == "DeadlineExceeded"
+
+    with pytest.raises(CallClient.Timeout):
+        CallClient.Ret(rets[1:]).capture()
+
+
+def test_map_returns_columns(server):
+    columns = {"a": [1, 2, 3], "b": [4, 5, 6]}
+    calls = [
+        (CallServer.Map(CallServer.Func("rows", lambda a, b: (a + b, a * b), None)), columns),
+        (CallServer.Map(CallServer.Func("vec", lambda a, b: [x - y for x, y in zip(a, b)], None, vectorized=True)), columns),
+        (CallServer.Map(CallServer.Func("short", lambda a, b: a[:1], None, vectorized=True)), columns),
+    ]
+    CallServer.Batch(server, b"a", False, calls).run()  # type: ignore
+
+    _, rets = server.replies[0]
+    assert rets[0] == [True, [[5, 7, 9], [4, 10, 18]], "map"]
+    assert rets[1] == [True, [[-3, -3, -3]], "map"]
+    assert rets[2][:1] == [False] and rets[2][1][0] == "ValueError"
+    assert CallClient.Ret(rets[:1]).capture() == ([5, 7, 9], [4, 10, 18])
+
+
+def test_batch_runs_on_process_pool(server):
+    with ProcessPoolExecutor(1) as pool:
+        calls = [(CallServer.Func("echo", echo, pool), {"data": "x"}), (CallServer.Func("echo", echo, pool), {"data": "y"})]
+        calls.append((CallServer.Map(CallServer.Func("echo", echo, pool)), {"data": ["x", "y"]}))
+        server.serve(CallServer.Batch(server, b"a", False, calls), timeout=10)  # type: ignore
+
+    assert server.replies == [(b"a", [[True, ["x"]], [True, ["y"]], [True, [["x", "y"]], "map"]])]
+
+
+def test_batch_fails_calls_on_shut_down_pool(server):
+    pool = ThreadPoolExecutor(1)
+    func = CallServer.Func("echo", echo, pool, limit=1)
+    pool.shutdown()
+    batch = CallServer.Batch(server, b"a", False, [(func, {"data": "x"})] * 2)  # type: ignore
+    batch.run()
+
+    _, rets = server.replies[0]
+    assert [ret[:1] + ret[1][:1] for ret in rets] == [[False, "RuntimeError"]] * 2
+    assert server.scheduler.running["echo"] == 0
@@ -0,0 +1,24 @@
+import time
+
+from cent.call.call import ExpiringSet
+
+
+def test_duplicates_and_expiry():
+    seen = ExpiringSet(ttl=0.05, max_size=100)
+    assert not seen.check(b"a")
+    assert seen.check(b"a")
+    assert not seen.check(b"b")
+    time.sleep(0.06)
+    assert not seen.check(b"a")
+    assert len(seen) == 1
+
+
+def test_hard_cap_evicts_oldest():
+    seen = ExpiringSet(ttl=60, max_size=3)
+    for key in (b"a", b"b", b"c"):
+        seen.check(key)
+    seen.check(b"a")  # NOTE: Refreshes a, b is now the oldest
+    seen.check(b"d")
+    assert len(seen) == 3
+    assert not seen.check(b"b")
+    assert seen.check(b"a")
@@ -0,0 +1,40 @@
+import random
+
+from cent.call.call import CallServer
+from cent.call.metrics import Histogram, Metrics
+
+
+def test_histogram_quantiles():
+    histogram = Histogram(precision=0.01)
+    values = [random.expovariate(100) for _ in range(10_000)] + [0.0]
+    for value in values:
+        histogram.record(value)
+
+    values.sort()
+    for q in (0.5, 0.9, 0.99):
+        exact = values[int(q * (len(values) - 1))]
+        assert abs(histogram.quantile(q) - exact) <= 0.02 * exact
+    assert histogram.snapshot()["count"] == len(values)
+    assert histogram.quantile(0) == 0.0
+
+
+def test_histogram_corrects_coordinated_omission():
+    histogram = Histogram()
+    histogram.record_corrected(1.0, 0.1)
+    assert histogram.count == 10
+    assert histogram.quantile(0.5) < 0.7
+
+
+def test_batch_records_metrics(server):
+    def fail():
+        raise ValueError()
+
+    server.metrics = Metrics()
+    calls = [(CallServer.Func("ok", lambda: 1, None), {}), (CallServer.Func("fail", fail, None), {})] * 2
+    CallServer.Batch(server, b"a", False, calls).run()  # type: ignore
+
+    snapshot = server.metrics.snapshot(reset=True)
+    assert snapshot["ok"]["calls"] == 2 and snapshot["ok"]["errors"] == 0
+    assert snapshot["fail"]["calls"] == 2 and snapshot["fail"]["errors"] == 2
+    assert snapshot["ok"]["exec"]["count"] == 2 and snapshot["ok"]["queue"]["min"] >= 0
+    assert server.metrics.snapshot() == {}
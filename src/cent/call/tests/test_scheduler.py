@@ -0,0 +1,38 @@
+from cent.call.call import PRIORITY_HIGH, PRIORITY_LOW, CallServer
+
+
+def batch(func: CallServer.Func, priority: int) -> CallServer.Batch:
+    batch = CallServer.Batch(None, b"", False, [(func, {})])  # type: ignore
+    batch.priority = priority
+    return batch
+
+
+def test_lanes_are_weighted():
+    scheduler = CallServer.Scheduler([3, 1])
+    func = CallServer.Func("f", lambda: None, None)
+    for _ in range(8):
+        scheduler.push(batch(func, 0))
+        scheduler.push(batch(func, 1))
+
+    order = [scheduler.take().priority for _ in range(8)]  # type: ignore
+    assert order.count(0) == 6 and order.count(1) == 2
+    assert order[:4].count(1) == 1
+
+
+def test_capped_func_is_skipped():
+    scheduler = CallServer.Scheduler()
+    capped = CallServer.Func("capped", lambda: None, None, limit=1)
+    other = CallServer.Func("other", lambda: None, None)
+
+    scheduler.push(batch(capped, PRIORITY_HIGH))
+    scheduler.push(batch(capped, PRIORITY_HIGH))
+    scheduler.push(batch(other, PRIORITY_LOW))
+
+    first = scheduler.take()
+    assert scheduler.acquire(first.next_func())  # type: ignore
+    assert scheduler.take().next_func() is other  # type: ignore
+    assert scheduler.take() is None
+
+    scheduler.release(capped)
+    assert scheduler.take().next_func() is capped  # type: ignore
+    assert len(scheduler) == 0
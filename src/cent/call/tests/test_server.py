@@ -0,0 +1,51 @@
+import threading
+from uuid import uuid4
+
+from cent.call.call import CallServer
+
+
+def test_unknown_function_fails_in_place(ether):
+    server = CallServer("svc", "", b"", metrics=False)
+    server.register("double", lambda x: 2 * x)
+
+    calls = [["double", {"x": 1}], ["missing", {}], ["double", {"x": 2}]]
+    batch = server.parse({"msg_id": uuid4().bytes, "service": "svc", "no_ret": False, "calls": calls})
+    batch.run()
+
+    assert batch.rets[0] == [True, [2]] and batch.rets[2] == [True, [4]]
+    assert batch.rets[1] == [False, ["UnknownFunction", "missing is not registered"]]
+
+
+def test_peers_agree_on_one_owner(ether):
+    a, b = CallServer("svc", "", b"", metrics=False), CallServer("svc", "", b"", metrics=False)
+    for server in (a, b):
+        server.register("f", lambda: None)
+
+    def call(**fields):
+        return {"msg_id": uuid4().bytes, "service": "svc", "no_ret": False, "calls": [["f", {}]], **fields}
+
+    # NOTE: Sent while both warm up, neither may decide on it before it knows the other
+    early = call()
+    backlogs = {}
+    thread = threading.Thread(target=lambda: backlogs.setdefault("b", b.warmup()))
+    thread.start()
+    a.root.send(b"", early)
+    backlogs["a"] = a.warmup()
+    thread.join()
+
+    assert backlogs == {"a": [early], "b": [early]}
+    assert b.instance in a.peers and a.instance in b.peers
+    for server in (a, b):
+        server.handle(early)
+    assert len(a.scheduler) + len(b.scheduler) == 1
+
+    owners = [(a.owns(msg_id, None), b.owns(msg_id, None)) for msg_id in (uuid4().bytes for _ in range(100))]
+    assert all(owned.count(True) == 1 for owned in owners)
+    assert 0 < sum(owned[0] for owned in owners) < 100
+
+    queued = len(a.scheduler), len(b.scheduler)
+    addressed = call(instance=b.instance)
+    assert not a.route(addressed) and not a.owns(addressed["msg_id"], b.instance)
+    a.handle(addressed)
+    b.handle(addressed)
+    assert (len(a.scheduler), len(b.scheduler)) == (queued[0], queued[1] + 1)
@@ -0,0 +1,221 @@
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+import typing as T
+
+from cent.data import CustomType, DataException, Datum
+from cent.data.t import JSONx, JSONxDecoder, JSONxIntern, PyO
+from cent.data.t.json import JSON
+
+STAGE_t = T.Tuple[str, T.Callable[[T.Any], T.Any]]
+
+
+class Vec:
+    def __init__(self, x: float, y: float, z: float) -> None:
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+CustomType.register("bench_vec", Vec, lambda v: PyO.load([v.x, v.y, v.z]), lambda d: Vec(*PyO.dump(d)))
+
+
+def _deep(depth: int) -> T.Any:
+    x: T.Any = {"leaf": 1}
+    for i in range(depth):
+        x = {"level": i, "next": [x]}
+    return x
+
+
+CORPORA: T.Dict[str, T.Any] = {
+    "rpc": {
+        "msg_id": b"\x07" * 16,
+        "service": "inventory",
+        "no_ret": False,
+        "calls": [["get_item", {"item_id": 1234, "fields": ["name", "price"]}]],
+    },
+    "wide_map": {f"key_{i}": i * 0.5 for i in range(1000)},
+    "deep": _deep(100),
+    "large_bytes": {"blob": bytes(range(256)) * 4096},
+    "custom": {"points": [Vec(i, i + 0.5, -i) for i in range(200)]},
+}
+
+
+def _stream_decode(x: str) -> Datum:
+    decoder = JSONxDecoder()
+    for i in range(0, len(x), 65536):
+        decoder.feed(x[i : i + 65536])
+    return decoder.close()
+
+
+def _intern_stages(x: T.Any) -> T.List[STAGE_t]:
+    sender, receiver = JSONxIntern(), JSONxIntern()
+    receiver.load(sender.dump(PyO.load(x)))  # NOTE: Steady state, tables already hold the keys
+    return [
+        ("load", PyO.load),
+        ("encode", sender.dump),
+        ("decode", receiver.load),
+        ("dump", PyO.dump),
+    ]
+
+
+TRANSFORMS: T.Dict[str, T.Callable[[T.Any], T.List[STAGE_t]]] = {
+    "PyO": lambda _: [
+        ("load", PyO.load),
+        ("dump", PyO.dump),
+    ],
+    "JSON": lambda _: [
+        ("load", PyO.load),
+        ("ast_dump", JSON.ast_dump),
+        ("encode", lambda d: json.dumps(PyO.dump(d))),
+        ("decode", lambda s: PyO.load(json.loads(s))),
+        ("ast_load", JSON.ast_load),
+        ("dump", PyO.dump),
+    ],
+    "JSONx": lambda _: [
+        ("load", PyO.load),
+        ("ast_dump", JSONx.ast_dump),
+        ("encode", lambda d: json.dumps(PyO.dump(d))),
+        ("decode", lambda s: PyO.load(json.loads(s))),
+        ("ast_load", JSONx.ast_load),
+        ("dump", PyO.dump),
+    ],
+    "JSONxIntern": _intern_stages,
+    "JSONxDecoder": lambda _: [
+        ("load", PyO.load),
+        ("encode", JSONx.dump),
+        ("decode", _stream_decode),
+        ("dump", PyO.dump),
+    ],
+}
+
+
+def run_stages(stages: T.List[STAGE_t], x: T.Any, timings: T.Optional[T.Dict[str, float]] = None) -> T.Any:
+    for name, stage in stages:
+        if timings is None:
+            x = stage(x)
+        else:
+            start = time.perf_counter()
+            x = stage(x)
+            timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+    return x
+
+
+def wire_size(stages: T.List[STAGE_t], x: T.Any) -> T.Optional[int]:
+    for name, stage in stages:
+        x = stage(x)
+        if name == "encode":
+            return len(x.encode("utf-8"))
+    return None
+
+
+def measure_memory(stages: T.List[STAGE_t], x: T.Any) -> T.Tuple[int, int]:
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        base, _ = tracemalloc.get_traced_memory()
+        result = run_stages(stages, x)
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    # NOTE: Blocks still alive after the round trip, i.e. what the decoded message costs to hold
+    retained = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+    del result
+    return peak - base, retained
+
+
+def bench(transform: str, corpus: str, duration: float, stages_breakdown: bool) -> T.Dict[str, T.Any]:
+    x = CORPORA[corpus]
+    stages = TRANSFORMS[transform](x)
+
+    try:
+        run_stages(stages, x)
+    except DataException as e:
+        return {"transform": transform, "corpus": corpus, "error": str(e) or "unsupported"}
+
+    n = 0
+    timings: T.Optional[T.Dict[str, float]] = {} if stages_breakdown else None
+    start = time.perf_counter()
+    while True:
+        run_stages(stages, x, timings)
+        n += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= duration:
+            break
+
+    peak, retained = measure_memory(stages, x)
+
+    result: T.Dict[str, T.Any] = {
+        "transform": transform,
+        "corpus": corpus,
+        "ops": n / elapsed,
+        "wire": wire_size(stages, x),
+        "peak": peak,
+        "retained": retained,
+    }
+    if timings is not None:
+        result["stages"] = {name: total / n for name, total in timings.items()}
+    return result
+
+
+def report(results: T.List[T.Dict[str, T.Any]], baseline: T.Optional[T.Dict[str, float]], threshold: float) -> int:
+    regressions = 0
+    print(f"{'corpus':<12} {'transform':<13} {'ops/s':>10} {'wire B':>10} {'peak B':>11} {'retained':>8}")
+    for r in results:
+        if "error" in r:
+            print(f"{r['corpus']:<12} {r['transform']:<13} {r['error']:>10}")
+            continue
+
+        wire = "-" if r["wire"] is None else str(r["wire"])
+        line = f"{r['corpus']:<12} {r['transform']:<13} {r['ops']:>10.1f} {wire:>10} {r['peak']:>11} {r['retained']:>8}"
+
+        key = f"{r['corpus']}/{r['transform']}"
+        if baseline is not None and key in baseline:
+            change = r["ops"] / baseline[key] - 1
+            line += f" {change:+.1%}"
+            if change < -threshold:
+                line += " REGRESSION"
+                regressions += 1
+        print(line)
+
+        for name, t in r.get("stages", {}).items():
+            print(f"{'':<12} {'':<13} {name:>10} {t * 1e6:>10.1f} us")
+
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round trip benchmark for cent.data transforms")
+    parser.add_argument("-c", "--corpus", action="append", choices=list(CORPORA), help="Default: all")
+    parser.add_argument("-t", "--transform", action="append", choices=list(TRANSFORMS), help="Default: all")
+    parser.add_argument("-d", "--duration", type=float, default=1.0, help="Seconds per case")
+    parser.add_argument("-s", "--stages", action="store_true", help="Per-stage time breakdown")
+    parser.add_argument("--save", help="Write ops/s per case to a JSON file")
+    parser.add_argument("--compare", help="Compare ops/s against a file written with --save")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Allowed slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10_000))
+
+    results = [
+        bench(transform, corpus, args.duration, args.stages)
+        for corpus in args.corpus or CORPORA
+        for transform in args.transform or TRANSFORMS
+    ]
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({f"{r['corpus']}/{r['transform']}": r["ops"] for r in results if "error" not in r}, f, indent=2)
+
+    sys.exit(1 if regressions else 0)
@@ -1,2 +1,4 @@
 from .jsonx import JSONx
+from .jsonx_intern import JSONxIntern
+from .jsonx_stream import JSONxDecoder
 from .pyo import PyO
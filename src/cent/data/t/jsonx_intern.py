@@ -0,0 +1,132 @@
+import json
+import sys
+import typing as T
+
+from cent.data import DataException, Datum, DatumType
+from cent.data.t.jsonx import JSONx
+from cent.data.t.pyo import PyO
+
+# NOTE: Pre-agreed table, both sides start from it. Append only, reordering breaks existing peers.
+STATIC_KEYS: T.Tuple[str, ...] = (
+    "__jsonx__",
+    "bytes",
+    "custom",
+    "msg_id",
+    "service",
+    "no_ret",
+    "calls",
+    "rets",
+)
+
+PREFIX = "`"
+DEFINE = "="
+
+
+# NOTE: Map keys and short identifier-like strings are sent once as a definition (`=name) and afterwards as a table
+#       reference (`1f). Both peers grow their tables in send order, so use one instance per connection.
+class JSONxIntern:
+    def __init__(self, static: T.Sequence[str] = STATIC_KEYS, max_size: int = 4096, max_len: int = 32) -> None:
+        self.max_size = max_size
+        self.max_keys = max_size * 3 // 4  # NOTE: The rest stays free for values (function names) that show up later
+        self.max_len = max_len
+
+        self.enc: T.Dict[str, str] = {s: PREFIX + format(i, "x") for i, s in enumerate(static)}
+        self.dec: T.List[Datum] = [Datum(DatumType.STRING, sys.intern(s)) for s in static]
+        self.staged: T.Dict[str, str] = {}
+
+    def dump(self, x: Datum) -> str:
+        # NOTE: Definitions made while building a frame only count once it encoded, a failed dump never reaches the peer
+        self.staged = {}
+        try:
+            x = JSONx.ast_dump(x)
+
+            if x.type == DatumType.MAP or x.type == DatumType.ARRAY:
+                obj = self._dump(x)
+            else:
+                raise DataException
+
+            frame = json.dumps(obj, separators=(",", ":"))
+            self.enc.update(self.staged)
+            return frame
+        finally:
+            self.staged = {}
+
+    def load(self, x: T.Union[str, bytes]) -> Datum:
+        try:
+            x_obj = json.loads(x)
+        except json.JSONDecodeError:
+            raise DataException
+
+        if isinstance(x_obj, (dict, list)):
+            ast = self._load(x_obj)
+        else:
+            raise DataException
+
+        return JSONx.ast_load(ast)
+
+    def _str(self, x: str, intern: bool) -> str:
+        ref = self.enc.get(x, None) or self.staged.get(x, None)
+        if ref is not None:
+            return ref
+
+        size = len(self.enc) + len(self.staged)
+        if intern and size < self.max_size:
+            self.staged[x] = PREFIX + format(size, "x")
+            return PREFIX + DEFINE + x
+
+        if x[:1] == PREFIX:
+            return PREFIX + x
+        return x
+
+    def _dump(self, x: Datum) -> T.Any:
+        if x.type == DatumType.MAP:
+            return {self._key(k): self._dump(v) for k, v in x.value.items()}
+
+        if x.type == DatumType.ARRAY:
+            items = x.value
+            if len(items) > 2 and items[0].value == "__jsonx__" and items[1].value == "bytes":
+                return [self._str(items[0].value, True), self._str(items[1].value, True), self._str(items[2].value, False)]
+            return [self._dump(v) for v in items]
+
+        if x.type == DatumType.STRING:
+            return self._str(x.value, self._internable(x.value, self.max_size))
+
+        return PyO.dump(x)
+
+    def _key(self, k: Datum) -> T.Any:
+        if k.type == DatumType.STRING:
+            return self._str(k.value, self._internable(k.value, self.max_keys))
+        return PyO.dump(k)
+
+    # NOTE: The table never evicts, so keys follow the same rule and can't take all of it (dicts keyed by ids)
+    def _internable(self, x: str, limit: int) -> bool:
+        return len(x) <= self.max_len and x.isidentifier() and len(self.enc) + len(self.staged) < limit
+
+    def _load_str(self, x: str) -> Datum:
+        if x[:1] != PREFIX:
+            return Datum(DatumType.STRING, x)
+
+        tag = x[1:2]
+        if tag == PREFIX:
+            return Datum(DatumType.STRING, x[1:])
+
+        if tag == DEFINE:
+            if len(self.dec) >= self.max_size:
+                raise DataException("String table overflow")
+            datum = Datum(DatumType.STRING, sys.intern(x[2:]))
+            self.dec.append(datum)
+            return datum
+
+        try:
+            return self.dec[int(x[1:], 16)]
+        except (ValueError, IndexError):
+            raise DataException(f"Invalid string reference: {x}")
+
+    def _load(self, x: T.Any) -> Datum:
+        if isinstance(x, str):
+            return self._load_str(x)
+        if isinstance(x, list):
+            return Datum(DatumType.ARRAY, [self._load(item) for item in x])
+        if isinstance(x, dict):
+            return Datum(DatumType.MAP, {self._load_str(k): self._load(v) for k, v in x.items()})
+        return PyO.load(x)
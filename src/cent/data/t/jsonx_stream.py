@@ -0,0 +1,250 @@
+import codecs
+import json
+import re
+import typing as T
+
+from cent.data import DataException, Datum, DatumType
+
+PATH_t = T.Tuple[T.Union[str, int], ...]
+NODE_t = T.Tuple[PATH_t, Datum]
+
+_WS = re.compile(r"[ \t\n\r]*")
+_NUMBER_RUN = re.compile(r"[-+0-9.eE]+")
+_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(\.[0-9]+)?([eE][-+]?[0-9]+)?")
+_LITERALS = (("true", DatumType.BOOL, True), ("false", DatumType.BOOL, False), ("null", DatumType.NULL, None))
+
+# Frame states
+_VALUE = 0  # Expecting a value (array start / after comma / after colon)
+_FIRST = 1  # Expecting a value or the closing bracket
+_NEXT = 2  # Expecting a comma or the closing bracket
+_KEY = 3  # Expecting a key
+_FIRST_KEY = 4  # Expecting a key or the closing brace
+_COLON = 5  # Expecting a colon
+
+
+class _Frame:
+    __slots__ = ("datum", "is_map", "state", "key", "n", "path", "jsonx")
+
+    def __init__(self, datum: Datum, path: PATH_t) -> None:
+        self.datum = datum
+        self.is_map = datum.type == DatumType.MAP
+        self.state = _FIRST_KEY if self.is_map else _FIRST
+        self.key: T.Optional[str] = None
+        self.n = 0
+        self.path = path
+        self.jsonx = False
+
+
+# NOTE: Nodes at `depth` (root is 0) are returned by `feed` as soon as they complete and are not kept in their parent,
+#       so memory is bounded by the largest node instead of the whole frame. `close` returns what is left of the root.
+class JSONxDecoder:
+    def __init__(self, depth: T.Optional[int] = None) -> None:
+        self.depth = depth
+        self.buf = ""
+        self.pos = 0
+        self.scan = 0
+        self.stack: T.List[_Frame] = []
+        self.root: T.Optional[Datum] = None
+        self.utf8 = codecs.getincrementaldecoder("utf-8")()
+
+    def feed(self, data: T.Union[str, bytes]) -> T.List[NODE_t]:
+        if isinstance(data, bytes):
+            try:
+                data = self.utf8.decode(data)
+            except UnicodeDecodeError as e:
+                raise DataException(str(e))
+
+        if self.pos:
+            self.buf = self.buf[self.pos :]
+            self.scan = max(self.scan - self.pos, 0)
+            self.pos = 0
+        self.buf += data
+
+        nodes: T.List[NODE_t] = []
+        self._parse(nodes, final=False)
+        return nodes
+
+    def close(self) -> Datum:
+        try:
+            tail = self.utf8.decode(b"", final=True)
+        except UnicodeDecodeError as e:
+            raise DataException(str(e))
+
+        self.buf = self.buf[self.pos :] + tail
+        self.scan = 0
+        self.pos = 0
+        self._parse([], final=True)
+
+        if self.root is None:
+            raise DataException("Truncated frame")
+        return self.root
+
+    @staticmethod
+    def iterload(chunks: T.Iterable[T.Union[str, bytes]], depth: T.Optional[int] = None) -> T.Iterator[NODE_t]:
+        decoder = JSONxDecoder(depth)
+        for chunk in chunks:
+            yield from decoder.feed(chunk)
+        yield (), decoder.close()
+
+    def _parse(self, nodes: T.List[NODE_t], final: bool) -> None:  # noqa: C901
+        buf = self.buf
+        size = len(buf)
+
+        while True:
+            self.pos = _WS.match(buf, self.pos).end()  # type: ignore
+            pos = self.pos
+            if pos == size:
+                return
+
+            if self.root is not None:
+                raise DataException("Extra data after frame")
+
+            c = buf[pos]
+            frame = self.stack[-1] if self.stack else None
+            state = frame.state if frame is not None else _VALUE
+
+            if state == _NEXT:
+                if c == ",":
+                    frame.state = _KEY if frame.is_map else _VALUE  # type: ignore
+                    self.pos += 1
+                elif c == ("}" if frame.is_map else "]"):  # type: ignore
+                    self.pos += 1
+                    self._close(nodes)
+                else:
+                    raise DataException(f"Expected ',' at {pos}")
+                continue
+
+            if state == _COLON:
+                if c != ":":
+                    raise DataException(f"Expected ':' at {pos}")
+                frame.state = _VALUE  # type: ignore
+                self.pos += 1
+                continue
+
+            if state == _KEY or state == _FIRST_KEY:
+                if c == "}" and state == _FIRST_KEY:
+                    self.pos += 1
+                    self._close(nodes)
+                    continue
+                if c != '"':
+                    raise DataException(f"Expected key at {pos}")
+                key = self._string(final)
+                if key is None:
+                    return
+                frame.key = key  # type: ignore
+                frame.state = _COLON  # type: ignore
+                continue
+
+            if c == "]" and state == _FIRST:
+                self.pos += 1
+                self._close(nodes)
+                continue
+
+            if c == "{" or c == "[":
+                self.pos += 1
+                datum = Datum(DatumType.MAP, {}) if c == "{" else Datum(DatumType.ARRAY, [])
+                path = () if frame is None else frame.path + (frame.key if frame.is_map else frame.n,)  # type: ignore
+                self.stack.append(_Frame(datum, path))
+                continue
+
+            if frame is None:
+                raise DataException("Frame is not a map or an array")
+
+            if c == '"':
+                value = self._string(final)
+                if value is None:
+                    return
+                self._add(Datum(DatumType.STRING, value), nodes)
+                continue
+
+            if c == "-" or "0" <= c <= "9":
+                end = _NUMBER_RUN.match(buf, pos).end()  # type: ignore
+                if end == size and not final:
+                    return
+                match = _NUMBER.fullmatch(buf, pos, end)
+                if match is None:
+                    raise DataException(f"Invalid number at {pos}")
+                self.pos = end
+                if match.group(1) or match.group(2):
+                    self._add(Datum(DatumType.FLOAT, float(match.group())), nodes)
+                else:
+                    self._add(Datum(DatumType.INT, int(match.group())), nodes)
+                continue
+
+            for word, datum_type, literal in _LITERALS:
+                if buf.startswith(word, pos):
+                    self.pos += len(word)
+                    self._add(Datum(datum_type, literal), nodes)
+                    break
+                if not final and size - pos < len(word) and word.startswith(buf[pos:]):
+                    return
+            else:
+                raise DataException(f"Unexpected {c!r} at {pos}")
+
+    def _string(self, final: bool) -> T.Optional[str]:
+        buf = self.buf
+        start = max(self.pos + 1, self.scan)
+        while True:
+            end = buf.find('"', start)
+            if end == -1:
+                if final:
+                    raise DataException("Unterminated string")
+                self.scan = len(buf)
+                return None
+
+            escapes = 0
+            while buf[end - escapes - 1] == "\\":
+                escapes += 1
+            if escapes % 2 == 0:
+                break
+            start = end + 1
+
+        try:
+            value, self.pos = json.decoder.scanstring(buf, self.pos + 1)  # type: ignore
+        except json.JSONDecodeError as e:
+            raise DataException(str(e))
+        self.scan = 0
+        return value
+
+    def _add(self, datum: Datum, nodes: T.List[NODE_t]) -> None:
+        frame = self.stack[-1]
+
+        if frame.is_map:
+            key = frame.key
+            if self.depth == len(self.stack) and not frame.jsonx:
+                nodes.append((frame.path + (key,), datum))  # type: ignore
+            else:
+                frame.datum.value[Datum(DatumType.STRING, key)] = datum
+        else:
+            if frame.n == 0 and datum.type == DatumType.STRING and datum.value == "__jsonx__":
+                frame.jsonx = True
+            if self.depth == len(self.stack) and not frame.jsonx:
+                nodes.append((frame.path + (frame.n,), datum))
+            else:
+                frame.datum.value.append(datum)
+
+        frame.n += 1
+        frame.state = _NEXT
+
+    def _close(self, nodes: T.List[NODE_t]) -> None:
+        frame = self.stack.pop()
+        datum = frame.datum
+
+        if frame.jsonx and len(datum.value) > 2:
+            kind = datum.value[1].value
+            if kind == "bytes":
+                try:
+                    datum = Datum(DatumType.BYTES, bytes.fromhex(datum.value[2].value))
+                except (TypeError, ValueError):
+                    raise DataException("Invalid bytes")
+            elif kind == "custom" and len(datum.value) > 3:
+                datum = Datum(DatumType.CUSTOM, datum.value[3], args=(datum.value[2],))
+            else:
+                raise DataException
+
+        if self.stack:
+            self._add(datum, nodes)
+        else:
+            self.root = datum
+            if self.depth == 0:
+                nodes.append(((), datum))
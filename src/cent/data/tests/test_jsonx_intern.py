@@ -0,0 +1,47 @@
+import pytest
+
+from cent.data.t import JSONx, JSONxIntern, PyO
+from cent.data.t.jsonx_intern import STATIC_KEYS
+
+
+def test_roundtrip_and_table_sync():
+    sender, receiver = JSONxIntern(), JSONxIntern()
+    msgs = [
+        {"msg_id": bytes([i]) * 16, "service": "svc", "no_ret": False, "calls": [["validate", {"x": i, "`raw": "`v"}]]}
+        for i in range(3)
+    ]
+
+    frames = [sender.dump(PyO.load(msg)) for msg in msgs]
+    assert [PyO.dump(receiver.load(frame)) for frame in frames] == msgs
+    assert len(frames[1]) < len(frames[0])
+    assert len(frames[1]) < len(JSONx.dump(PyO.load(msgs[1])))
+    assert len(sender.enc) == len(receiver.dec)
+
+
+def test_decoded_strings_are_shared():
+    sender, receiver = JSONxIntern(), JSONxIntern()
+    a = PyO.dump(receiver.load(sender.dump(PyO.load({"function_name": 1}))))
+    b = PyO.dump(receiver.load(sender.dump(PyO.load({"function_name": 2}))))
+    assert next(iter(a)) is next(iter(b))
+
+
+def test_failed_dump_defines_nothing():
+    sender, receiver = JSONxIntern(), JSONxIntern()
+    with pytest.raises(Exception):
+        sender.dump(PyO.load({"alpha": 1, "beta": {b"k": 1}}))
+    assert sender.staged == {}
+
+    receiver.load(sender.dump(PyO.load({"gamma": 1})))
+    assert PyO.dump(receiver.load(sender.dump(PyO.load({"alpha": 2})))) == {"alpha": 2}
+
+
+def test_only_short_identifier_keys_are_interned():
+    sender, receiver = JSONxIntern(), JSONxIntern()
+    msg = {"x" * 100_000: 1, "1234": 2, "name": 3}
+    assert PyO.dump(receiver.load(sender.dump(PyO.load(msg)))) == msg
+    assert len(sender.enc) == len(receiver.dec) == len(STATIC_KEYS) + 1
+
+    for i in range(sender.max_size):
+        sender.dump(PyO.load({f"id_{i}": i}))
+    assert len(sender.enc) == sender.max_keys
+    assert sender.dump(PyO.load(["validate"])) == '["`=validate"]'
@@ -0,0 +1,55 @@
+import pytest
+
+from cent.data import CustomType, DataException
+from cent.data.t import JSONx, JSONxDecoder, PyO
+
+
+class Point:
+    def __init__(self, x: int, y: int) -> None:
+        self.x = x
+        self.y = y
+
+
+CustomType.register("test_point", Point, lambda p: PyO.load([p.x, p.y]), lambda d: Point(*PyO.dump(d)))
+
+OBJ = {
+    "msg_id": b"\x00\x01" * 8,
+    "calls": [["f", {"a": 1, "b": -2.5e3, "c": None, "d": [True, False]}], ["g", {"s": 'q"\\u\u00e9\U0001f600'}]],
+    "empty": [{}, []],
+}
+
+
+def test_feed_bytewise_matches_load():
+    data = JSONx.dump(PyO.load(OBJ)).encode()
+    decoder = JSONxDecoder()
+    for i in range(len(data)):
+        assert decoder.feed(data[i : i + 1]) == []
+    assert PyO.dump(decoder.close()) == PyO.dump(JSONx.load(data))
+
+
+def test_nodes_are_detached_at_depth():
+    data = JSONx.dump(PyO.load({"items": [{"n": i} for i in range(5)] + [b"\xff", Point(1, 2)]}))
+    decoder = JSONxDecoder(depth=2)
+    nodes = []
+    for i in range(0, len(data), 7):
+        nodes.extend(decoder.feed(data[i : i + 7]))
+
+    assert [path for path, _ in nodes] == [("items", i) for i in range(7)]
+    assert [PyO.dump(node) for _, node in nodes[:5]] == [{"n": i} for i in range(5)]
+    assert PyO.dump(nodes[5][1]) == b"\xff"
+    assert PyO.dump(nodes[6][1]).y == 2
+    assert PyO.dump(decoder.close()) == {"items": []}
+
+
+def test_iterload_yields_root_last():
+    chunks = ['{"a": [1, 2', "], ", '"b": tr', "ue}"]
+    nodes = list(JSONxDecoder.iterload(chunks, depth=1))
+    assert [(path, PyO.dump(node)) for path, node in nodes] == [(("a",), [1, 2]), (("b",), True), ((), {})]
+
+
+@pytest.mark.parametrize("data", ['{"a": 1', '{"a" 1}', "[1,]x", "12", '["__jsonx__", "nope", 1]', "[1] [2]"])
+def test_invalid(data):
+    decoder = JSONxDecoder()
+    with pytest.raises(DataException):
+        decoder.feed(data)
+        decoder.close()
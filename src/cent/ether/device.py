@@ -1,11 +1,14 @@
 import os
 import threading
 import typing as T
+from collections import deque
 
 from cent.data import Datum
 
 LOOP_TIME = 1 / int(os.getenv("ETHER_FREQ", 1000))
 SLOW_LOOP_TIME = 1 / int(os.getenv("ETHER_SLOW_FREQ", 1))
+INTERN = bool(int(os.getenv("ETHER_INTERN", 0)))
+QUEUE_SIZE = int(os.getenv("ETHER_QUEUE_SIZE", 10_000))
 
 MSG_t = T.Tuple[bytes, Datum]
 
@@ -13,18 +16,18 @@ TV = T.TypeVar("TV")
 
 
 class Queue(T.Generic[TV]):
-    def __init__(self, max_size: int = 1000) -> None:
+    def __init__(self, max_size: int = QUEUE_SIZE) -> None:
         self.lock = threading.Lock()
         self.not_empty = threading.Event()
 
-        self.store = []
+        self.store: T.Deque[TV] = deque()
         self.n = 0
         self.max_size = max_size
 
     def put(self, item: TV) -> None:
         with self.lock:
             if self.n == self.max_size:
-                self.store.pop(0)
+                self.store.popleft()
                 self.store.append(item)
             else:
                 self.store.append(item)
@@ -43,7 +46,7 @@ class Queue(T.Generic[TV]):
 
             self.n -= 1
 
-            return self.store.pop(0)
+            return self.store.popleft()
 
 
 class Device:
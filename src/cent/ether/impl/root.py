@@ -96,20 +96,22 @@ class Root(Device):
 
     def _fetch_incoming(self) -> None:
         for child in self.coms:
-            try:
-                self.incoming.put(child.incoming.get(0))
-            except TimeoutError:
-                pass
+            while True:
+                try:
+                    self.incoming.put(child.incoming.get(0))
+                except TimeoutError:
+                    break
 
     def _push_outgoing(self) -> None:
-        try:
-            msg = self.outgoing.get(LOOP_TIME)
-        except TimeoutError:
-            return
+        while True:
+            try:
+                msg = self.outgoing.get(0)
+            except TimeoutError:
+                return
 
-        for child in self.coms:
-            child.outgoing.put(msg)
-            child.add_event("new_outgoing")
+            for child in self.coms:
+                child.outgoing.put(msg)
+                child.add_event("new_outgoing")
 
     def add_com(self, com: Com) -> None:
         log.debug(f"Adding com: {len(self.coms)} | {type(com).__name__} - {com}")
@@ -1,9 +1,11 @@
+import os
 import ssl
 import threading
 import typing as T
 
 from cent.data import DataException
-from cent.data.t import JSONx
+from cent.data.t import JSONx, JSONxIntern
+from cent.ether.device import INTERN
 from cent.ether.impl.root import LOOP_TIME, Com, Root
 from cent.logging import Logger
 from websockets.exceptions import ConnectionClosed, ConnectionClosedError, ConnectionClosedOK
@@ -12,6 +14,14 @@ from websockets.sync.server import serve
 
 log = Logger(__name__)
 
+OPT_INTERN = "intern"
+RECV_BATCH = 100
+RECV_LINGER = LOOP_TIME / 10
+LOG_MSG_RATE = float(os.getenv("LOG_MSG_RATE") or 10)
+
+log_sent = log.limited(rate=LOG_MSG_RATE)
+log_recv = log.limited(rate=LOG_MSG_RATE)
+
 
 class ServerCom(Com):
     def __init__(
@@ -70,6 +80,7 @@ class HandlerCom(Com):
     def __init__(self, parent: Root, ws) -> None:
         super().__init__(parent)
         self.ws = ws
+        self.codec: T.Union[T.Type[JSONx], JSONxIntern] = JSONx
 
     def start(self):
         self.active = True
@@ -91,9 +102,10 @@ class HandlerCom(Com):
 
             elif event == "new_outgoing":
                 self._send()
+                self._recv(0)
 
             elif event is None:
-                self._recv()
+                self._recv(LOOP_TIME)
 
     def _init_con(self):
         try:
@@ -118,6 +130,10 @@ class HandlerCom(Com):
             self.stop()
             return
 
+        channel_data, *options = channel_data.split(":")
+        if OPT_INTERN in options:
+            self.codec = JSONxIntern()
+
         try:
             self.channel = bytes.fromhex(channel_data)
         except ValueError:
@@ -130,47 +146,54 @@ class HandlerCom(Com):
             self.stop()
             return
 
-        log.info(f"AUTH: {self.channel.hex()}")
+        log.info(f"AUTH: {self.channel.hex()}{' | ' + ','.join(options) if options else ''}")
 
     def _send(self):
-        try:
-            channel, value = self.outgoing.get(0)
-            if channel == self.channel:
-                self.ws.send(JSONx.dump(value))
-                log.info(f"MSG: > {self.channel.hex()}")
-        except TimeoutError:
-            log.warning("No messages")
-        except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
-            log.warning(f"DC: {self.channel.hex()}")
-            self.stop()
-
-    def _recv(self):
-        try:
-            msg_data = self.ws.recv(LOOP_TIME)
-            msg = JSONx.load(msg_data)
-            self.incoming.put((self.channel, msg))
-            self.parent.add_event("new_incoming")
-            log.info(f"MSG: < {self.channel.hex()}")
-        except TimeoutError:
-            pass
-        except DataException as exc:
-            log.warning(f"INV_PKT: {self.channel.hex()} - {str(exc)}")
-        except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
-            log.warning(f"DC: {self.channel.hex()}")
-            self.stop()
+        while True:
+            try:
+                channel, value = self.outgoing.get(0)
+                if channel == self.channel:
+                    self.ws.send(self.codec.dump(value))
+                    log_sent.info("MSG: >", self.channel.hex())
+            except TimeoutError:
+                return
+            except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
+                log.warning(f"DC: {self.channel.hex()}")
+                self.stop()
+                return
+
+    def _recv(self, timeout: float):
+        for _ in range(RECV_BATCH):
+            try:
+                msg_data = self.ws.recv(timeout)
+                timeout = RECV_LINGER
+                msg = self.codec.load(msg_data)
+                self.incoming.put((self.channel, msg))
+                self.parent.add_event("new_incoming")
+                log_recv.info("MSG: <", self.channel.hex())
+            except TimeoutError:
+                return
+            except DataException as exc:
+                log.warning(f"INV_PKT: {self.channel.hex()} - {str(exc)}")
+            except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
+                log.warning(f"DC: {self.channel.hex()}")
+                self.stop()
+                return
 
 
 class ClientCom(Com):
-    def __init__(self, parent: Root, uri: str, channel: bytes) -> None:
+    def __init__(self, parent: Root, uri: str, channel: bytes, intern: T.Optional[bool] = None) -> None:
         super().__init__(parent)
         self.uri = uri
         self.channel = channel
+        self.intern = INTERN if intern is None else intern
+        self.codec: T.Union[T.Type[JSONx], JSONxIntern] = JSONxIntern() if self.intern else JSONx
 
     def start(self):
         self.active = True
         log.info(f"Connecting to ws_jsonx server | {self.uri}")
         self.ws = connect(self.uri)
-        self.ws.send(self.channel.hex())
+        self.ws.send(self.channel.hex() + (":" + OPT_INTERN if self.intern else ""))
 
         self.thread = threading.Thread(target=self.loop)
         self.thread.start()
@@ -189,33 +212,39 @@ class ClientCom(Com):
 
             elif event == "new_outgoing":
                 self._send()
+                self._recv(0)
 
             elif event is None:
-                self._recv()
+                self._recv(LOOP_TIME)
 
     def _send(self):
-        try:
-            channel, value = self.outgoing.get(0)
-            if channel == self.channel:
-                self.ws.send(JSONx.dump(value))
-                log.info(f"MSG: > {self.channel.hex()}")
-        except TimeoutError:
-            log.warning("No messages")
-        except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
-            log.warning(f"DC: {self.channel.hex()}")
-            self.stop()
-
-    def _recv(self):
-        try:
-            msg_data = self.ws.recv(LOOP_TIME)
-            msg = JSONx.load(msg_data)
-            self.incoming.put((self.channel, msg))
-            self.parent.add_event("new_incoming")
-            log.info(f"MSG: < {self.channel.hex()}")
-        except TimeoutError:
-            pass
-        except DataException as exc:
-            log.warning(f"INV_PKT: {self.channel.hex()} - {str(exc)}")
-        except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
-            log.warning(f"DC: {self.channel.hex()}")
-            self.stop()
+        while True:
+            try:
+                channel, value = self.outgoing.get(0)
+                if channel == self.channel:
+                    self.ws.send(self.codec.dump(value))
+                    log_sent.info("MSG: >", self.channel.hex())
+            except TimeoutError:
+                return
+            except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
+                log.warning(f"DC: {self.channel.hex()}")
+                self.stop()
+                return
+
+    def _recv(self, timeout: float):
+        for _ in range(RECV_BATCH):
+            try:
+                msg_data = self.ws.recv(timeout)
+                timeout = RECV_LINGER
+                msg = self.codec.load(msg_data)
+                self.incoming.put((self.channel, msg))
+                self.parent.add_event("new_incoming")
+                log_recv.info("MSG: <", self.channel.hex())
+            except TimeoutError:
+                return
+            except DataException as exc:
+                log.warning(f"INV_PKT: {self.channel.hex()} - {str(exc)}")
+            except (ConnectionClosed, ConnectionClosedOK, ConnectionClosedError) as e:
+                log.warning(f"DC: {self.channel.hex()}")
+                self.stop()
+                return
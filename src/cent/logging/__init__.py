@@ -1 +1 @@
-from cent.logging.logging import Logger
+from cent.logging.logging import Format, Logger
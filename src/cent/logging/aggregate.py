@@ -0,0 +1,184 @@
+import json
+import multiprocessing
+import os
+import selectors
+import socket
+import sys
+import tempfile
+import threading
+import typing as T
+
+from cent.logging.logging import PRINTER_MANAGER, ThreadedPrinter, evaluate, render_failed
+
+SCALARS = (str, int, float, bool, type(None))
+
+
+# NOTE: Records cross the socket as NDJSON. Args stay raw when JSON can carry them, anything else is turned into a
+#       string here on the forwarding thread; filtering and output happen in the aggregating parent.
+def encode(args: T.Tuple[T.Any, ...], meta: T.Dict[str, T.Any], log_level: T.Any, pid: int, process: str) -> bytes:
+    try:
+        raw = [arg if isinstance(arg, SCALARS) else str(arg) for arg in evaluate(args)]
+    except Exception as e:
+        raw = [render_failed(e)]
+    record = {
+        "args": raw,
+        "level": log_level,
+        "meta": {**meta, "pid": pid, "process": process},
+    }
+    return json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+# NOTE: Child side, same batching as ThreadedPrinter but each wakeup is one `sendall` to the aggregator. Falls back to
+#       printing locally if the aggregator can't be reached.
+class ForwardPrinter(ThreadedPrinter):
+    def __init__(self, path: str, **kwargs: T.Any) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self.sock: T.Optional[socket.socket] = None
+        self.pid = os.getpid()
+        self.process = multiprocessing.current_process().name
+
+    def start(self) -> None:
+        try:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(self.path)
+        except OSError:
+            self.sock = None
+        super().start()
+
+    def close(self) -> None:
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def flush(self) -> None:
+        if self.sock is None:
+            super().flush()
+
+    def write(self, records: T.Iterable, dropped: int) -> bool:
+        if self.sock is None:
+            return super().write(records, dropped)
+
+        records = list(records)
+        if dropped:
+            self.dropped_total += dropped
+            records.append(((f"Dropped {dropped} log records, queue full",), {"name": "Printer"}, 30))
+        if not records:
+            return False
+
+        data = b"".join(encode(args, meta, log_level, self.pid, self.process) for args, meta, log_level in records)
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.close()
+            return super().write(records, 0)
+        return False
+
+
+# NOTE: Parent side. Processes started after `start` (forked or spawned) inherit LOG_AGGREGATE and forward their
+#       records here, which go into this process's printer with the child's pid, process, thread and time kept.
+class Aggregator:
+    def __init__(self, path: T.Optional[str] = None) -> None:
+        self.dir = None if path else tempfile.mkdtemp(prefix="cent-log-")
+        self.path = path or os.path.join(self.dir, "log.sock")  # type: ignore
+        self.selector = selectors.DefaultSelector()
+        self.buffers: T.Dict[socket.socket, bytes] = {}
+        self.active = False
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.thread = threading.Thread(name="Printer|aggregator", target=self.loop, daemon=True)
+        self.wake_r, self.wake_w = socket.socketpair()
+
+    def start(self) -> "Aggregator":
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        self.server.listen()
+        self.server.setblocking(False)
+        self.selector.register(self.server, selectors.EVENT_READ)
+        self.selector.register(self.wake_r, selectors.EVENT_READ)
+
+        PRINTER_MANAGER.capture_printer()
+        os.environ["LOG_AGGREGATE"] = self.path
+        os.environ["LOG_AGGREGATE_PID"] = str(os.getpid())
+        self.active = True
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        if os.environ.get("LOG_AGGREGATE") == self.path:
+            del os.environ["LOG_AGGREGATE"]
+            del os.environ["LOG_AGGREGATE_PID"]
+        self.active = False
+        self.wake_w.send(b"\0")
+        self.thread.join()
+        PRINTER_MANAGER.release_printer()
+
+    def loop(self) -> None:
+        try:
+            while self.active:
+                for key, _ in self.selector.select():
+                    if key.fileobj is self.server:
+                        self.accept()
+                    elif key.fileobj is not self.wake_r:
+                        self.read(key.fileobj)  # type: ignore
+        finally:
+            self.drain()
+
+    def accept(self) -> None:
+        conn, _ = self.server.accept()
+        conn.setblocking(False)
+        self.buffers[conn] = b""
+        self.selector.register(conn, selectors.EVENT_READ)
+
+    def drain(self) -> None:
+        # NOTE: Children still connected at shutdown get drained once more before everything is closed
+        while True:
+            try:
+                self.accept()
+            except OSError:
+                break
+        for conn in list(self.buffers):
+            self.read(conn)
+        for sock in [*self.buffers, self.server, self.wake_r, self.wake_w]:
+            sock.close()
+        self.selector.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        if self.dir is not None:
+            os.rmdir(self.dir)
+
+    def read(self, conn: socket.socket) -> None:
+        chunks = []
+        closed = False
+        while True:
+            try:
+                chunk = conn.recv(1 << 16)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                closed = True
+                break
+            if not chunk:
+                closed = True
+                break
+            chunks.append(chunk)
+
+        data = self.buffers.get(conn, b"") + b"".join(chunks)
+        lines = data.split(b"\n")
+        self.buffers[conn] = lines.pop()
+        for line in lines:
+            self.add(line)
+
+        if closed:
+            self.selector.unregister(conn)
+            del self.buffers[conn]
+            conn.close()
+
+    @staticmethod
+    def add(line: bytes) -> None:
+        try:
+            record = json.loads(line)
+            PRINTER_MANAGER.printer.add_log(*record["args"], meta=record["meta"], log_level=record["level"])  # type: ignore
+        except (ValueError, KeyError, TypeError) as exc:
+            print(f"Invalid forwarded log record: {type(exc).__name__} - {exc}", file=sys.stderr)
@@ -0,0 +1,190 @@
+import argparse
+import contextlib
+import io
+import logging as py_logging
+import threading
+import time
+import tracemalloc
+import typing as T
+
+from cent.logging import logging as cent_logging
+from cent.logging.logging import PRINTER_MANAGER, ClassicPrinter, Logger, Printer, Rules, ThreadedPrinter
+from cent.rhythm.histogram import Histogram
+
+NAME = "cent.logging.bench"
+
+
+class Counter(io.TextIOBase):
+    # NOTE: Stands in for stdout, `delay` per line makes a writer slower than the producers
+    def __init__(self, delay: float = 0) -> None:
+        self.lines = 0
+        self.delay = delay
+
+    def write(self, s: str) -> int:
+        n = s.count("\n")
+        self.lines += n
+        if self.delay:
+            time.sleep(self.delay * n)
+        return len(s)
+
+    def flush(self) -> None:
+        pass
+
+
+@contextlib.contextmanager
+def rules(n: int) -> T.Iterator[None]:
+    # NOTE: `n` ignore and focus rules that don't hit the bench logger, compiled the same way LOG_IGNORE/LOG_FOCUS are
+    ignore, focus = cent_logging.IGNORE_RULES, cent_logging.FOCUS_RULES
+    if n:
+        cent_logging.IGNORE_RULES = Rules(",".join(f"other.{i}.*" for i in range(n)))
+        cent_logging.FOCUS_RULES = Rules(",".join([NAME, *(f"focus.{i}" for i in range(n))]))
+    cent_logging.min_level.cache_clear()
+    try:
+        yield
+    finally:
+        cent_logging.IGNORE_RULES, cent_logging.FOCUS_RULES = ignore, focus
+        cent_logging.min_level.cache_clear()
+
+
+def timer_overhead() -> int:
+    samples = []
+    for _ in range(10_000):
+        t0 = time.perf_counter_ns()
+        samples.append(time.perf_counter_ns() - t0)
+    return sorted(samples)[len(samples) // 2]
+
+
+def emitter(source: str, enabled: bool) -> T.Tuple[T.Callable[..., None], str]:
+    if source == "stdlib":
+        py_logger = py_logging.getLogger(NAME)
+        py_logger.setLevel(py_logging.INFO)
+        py_logger.propagate = True
+        return (py_logger.info if enabled else py_logger.debug), "bench record %d of %s"
+
+    log = Logger(NAME)
+    log.level = cent_logging.min_level(NAME)
+    return (log.info if enabled else log.debug), "bench record"
+
+
+def produce(emit: T.Callable[..., None], msg: str, n: int, barrier: threading.Barrier, out: T.List[int]) -> None:
+    barrier.wait()
+    perf_counter_ns = time.perf_counter_ns
+    for i in range(n):
+        t0 = perf_counter_ns()
+        emit(msg, i, NAME)
+        out.append(perf_counter_ns() - t0)
+
+
+def bench(
+    printer_kind: str,
+    source: str,
+    enabled: bool,
+    threads: int,
+    records: int,
+    n_rules: int = 0,
+    delay: float = 0,
+    max_size: T.Optional[int] = None,
+    memory: bool = False,
+) -> T.Dict[str, T.Any]:
+    counter = Counter(delay)
+    printer: Printer
+    if printer_kind == "threaded":
+        printer = ThreadedPrinter(out=counter) if max_size is None else ThreadedPrinter(max_size=max_size, out=counter)
+    else:
+        printer = ClassicPrinter()
+
+    previous = PRINTER_MANAGER.printer
+    PRINTER_MANAGER.printer = printer
+    printer.start()
+    if memory:
+        tracemalloc.start()
+
+    latencies: T.List[T.List[int]] = [[] for _ in range(threads)]
+    with rules(n_rules), contextlib.redirect_stdout(counter):
+        emit, msg = emitter(source, enabled)
+        barrier = threading.Barrier(threads + 1)
+        workers = [
+            threading.Thread(target=produce, args=(emit, msg, records, barrier, latencies[i]), name=f"producer{i}")
+            for i in range(threads)
+        ]
+        for worker in workers:
+            worker.start()
+        barrier.wait()
+        start = time.perf_counter()
+        for worker in workers:
+            worker.join()
+        produced = time.perf_counter() - start
+
+        peak = 0
+        queued = len(printer.deque) if isinstance(printer, ThreadedPrinter) else 0
+        if memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+        printer.stop()
+        if isinstance(printer, ThreadedPrinter):
+            printer.thread.join()
+        drained = time.perf_counter() - start
+
+    PRINTER_MANAGER.printer = previous
+
+    histogram = Histogram()
+    for samples in latencies:
+        for sample in samples:
+            histogram.record(sample)
+
+    total = threads * records
+    case = f"{printer_kind}/{source}/{'on' if enabled else 'off'}/t{threads}/r{n_rules}"
+    if delay:
+        case += f"/slow{delay * 1e6:g}us/" + (f"q{max_size}" if max_size and max_size < 1 << 32 else "unbounded")
+    return {
+        "case": case,
+        "produce_rate": total / produced,
+        "write_rate": counter.lines / drained,
+        "written": counter.lines,
+        "dropped": getattr(printer, "dropped_total", 0),
+        "queued": queued,
+        "peak_mb": peak / 2**20,
+        "latency": histogram.snapshot(),
+    }
+
+
+def report(results: T.List[T.Dict[str, T.Any]], overhead: int) -> None:
+    print(f"timer overhead ~{overhead} ns per sample (included below)")
+    header = f"{'case':<44} {'rec/s in':>10} {'rec/s out':>10} {'p50 ns':>8} {'p99 ns':>8} {'p99.9 ns':>9} {'max us':>8}"
+    print(header + f" {'dropped':>8} {'queued':>7} {'peak MB':>8}")
+    for r in results:
+        lat = r["latency"]
+        print(
+            f"{r['case']:<44} {r['produce_rate']:>10.0f} {r['write_rate']:>10.0f} {lat['p50']:>8.0f} {lat['p99']:>8.0f}"
+            f" {lat['p99.9']:>9.0f} {lat['max'] / 1e3:>8.1f} {r['dropped']:>8} {r['queued']:>7} {r['peak_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Caller-side cost and throughput of cent.logging")
+    parser.add_argument("-p", "--printer", choices=["classic", "threaded"], action="append", help="Default: both")
+    parser.add_argument("-s", "--source", choices=["logger", "stdlib"], action="append", help="Default: both")
+    parser.add_argument("-t", "--threads", type=int, action="append", help="Producer threads, default: 1 and 4")
+    parser.add_argument("-n", "--records", type=int, default=50_000, help="Records per producer thread")
+    parser.add_argument("-r", "--rules", type=int, default=50, help="Ignore/focus rules for the rules cases")
+    parser.add_argument("--flood-delay", type=float, default=20e-6, help="Seconds per line for the slow writer cases")
+    parser.add_argument("--no-flood", action="store_true", help="Skip the slow writer (memory growth) cases")
+    args = parser.parse_args()
+
+    results = []
+    for printer_kind in args.printer or ["classic", "threaded"]:
+        for source in args.source or ["logger", "stdlib"]:
+            for threads in args.threads or [1, 4]:
+                for enabled in (True, False):
+                    results.append(bench(printer_kind, source, enabled, threads, args.records))
+                results.append(bench(printer_kind, source, True, threads, args.records, args.rules))
+
+    if not args.no_flood:
+        for max_size in (cent_logging.LOG_QUEUE_SIZE, 1 << 62):
+            for threads in args.threads or [1, 4]:
+                results.append(
+                    bench("threaded", "logger", True, threads, args.records, 0, args.flood_delay, max_size, memory=True)
+                )
+
+    report(results, timer_overhead())
@@ -1,6 +1,8 @@
 import atexit
+import functools
 import logging as py_logging
 import os
+import sys
 import threading
 import time
 import typing as T
@@ -21,27 +23,22 @@ LOG_LEVEL_t = T.Union[
 ]
 
 
+NOTSET, DEBUG, INFO, WARNING, ERROR, CRITICAL = 0, 10, 20, 30, 40, 50
+LEVELS = {"NOTSET": NOTSET, "DEBUG": DEBUG, "INFO": INFO, "WARNING": WARNING, "ERROR": ERROR, "CRITICAL": CRITICAL}
+DISABLED = 1 << 31
+
+
 def interpret_log_level(log_level: T.Any) -> int:
     if isinstance(log_level, int):
         return log_level
     elif isinstance(log_level, str):
-        if log_level == "NOTSET":
+        level = LEVELS.get(log_level, None)
+        if level is not None:
+            return level
+        try:
+            return int(log_level)
+        except ValueError:
             return 0
-        elif log_level == "DEBUG":
-            return 10
-        elif log_level == "INFO":
-            return 20
-        elif log_level == "WARNING":
-            return 30
-        elif log_level == "ERROR":
-            return 40
-        elif log_level == "CRITICAL":
-            return 50
-        else:
-            try:
-                return int(log_level)
-            except ValueError:
-                return 0
     else:
         return 0
 
@@ -50,6 +47,80 @@ LOG_LEVEL = interpret_log_level(os.getenv("LOG_LEVEL") or "INFO")
 LOG_IGNORE = os.getenv("LOG_IGNORE")
 LOG_FOCUS = os.getenv("LOG_FOCUS")
 LOG_THREADED = bool(os.getenv("LOG_THREADED") or True)
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE") or 10_000)
+LOG_FLUSH_INTERVAL = float(os.getenv("LOG_FLUSH_INTERVAL") or 0.1)
+LOG_FLUSH_LEVEL = interpret_log_level(os.getenv("LOG_FLUSH_LEVEL") or "ERROR")
+LOG_SUMMARY_INTERVAL = float(os.getenv("LOG_SUMMARY_INTERVAL") or 10)
+LOG_STDOUT = os.getenv("LOG_STDOUT") != "0"
+LOG_FILE = os.getenv("LOG_FILE")
+LOG_RING = os.getenv("LOG_RING")
+
+
+# NOTE: Comma separated logger names, a trailing "*" matches by prefix
+class Rules:
+    def __init__(self, spec: T.Optional[str]) -> None:
+        names: T.Set[str] = set()
+        prefixes: T.List[str] = []
+        for rule in (spec or "").split(","):
+            rule = rule.strip()
+            if not rule:
+                continue
+            if rule[-1] == "*":
+                prefixes.append(rule[:-1])
+            else:
+                names.add(rule)
+        self.names = frozenset(names)
+        self.prefixes = tuple(prefixes)
+
+    def __bool__(self) -> bool:
+        return bool(self.names or self.prefixes)
+
+    def match(self, name: str) -> bool:
+        return name in self.names or name.startswith(self.prefixes)
+
+
+IGNORE_RULES = Rules(LOG_IGNORE)
+FOCUS_RULES = Rules(LOG_FOCUS)
+
+
+@functools.lru_cache(maxsize=None)
+def min_level(name: str) -> int:
+    # NOTE: Lowest level a logger prints at, filters only depend on the name so this is decided once per name
+    if IGNORE_RULES.match(name) or (FOCUS_RULES and not FOCUS_RULES.match(name)):
+        return DISABLED
+    return LOG_LEVEL
+
+
+# NOTE: Explicit %-style message, `log.info(Format("sent %d bytes to %s", n, peer))`, formatted only when printed
+class Format:
+    __slots__ = ("fmt", "args")
+
+    def __init__(self, fmt: str, *args: T.Any) -> None:
+        self.fmt = fmt
+        self.args = args
+
+    def __str__(self) -> str:
+        return self.fmt % self.args
+
+
+def evaluate(args: T.Tuple[T.Any, ...]) -> T.Tuple[T.Any, ...]:
+    # NOTE: A single callable arg is a lazy message, `log.debug(lambda: expensive())`
+    if len(args) == 1 and callable(args[0]) and not isinstance(args[0], type):
+        return (args[0](),)
+    return args
+
+
+def render_failed(exc: Exception) -> str:
+    return f"<failed to render log message: {type(exc).__name__} - {exc}>"
+
+
+def render(args: T.Tuple[T.Any, ...]) -> str:
+    # NOTE: Messages are built on the printer side, so records that get filtered out never pay for it. Anything raised
+    #       while building one must not take the printer thread down with it.
+    try:
+        return " ".join([str(item) for item in evaluate(args)])
+    except Exception as e:
+        return render_failed(e)
 
 
 class ANSICode:
@@ -73,34 +144,19 @@ class Printer:
         raise NotImplementedError()
 
     def _log(self, *args: T.Any, meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> None:
-        log_level = interpret_log_level(log_level)
+        output = self._format(*args, meta=meta, log_level=log_level)
+        if output is not None:
+            print(output, flush=True)
 
-        # Filters
-
-        if log_level < LOG_LEVEL:
-            return
-
-        if "name" in meta:
-            name = meta["name"]
+    def _format(self, *args: T.Any, meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> T.Optional[str]:
+        log_level = interpret_log_level(log_level)
+        name = meta.get("name", "?")
+        thread_marker = meta.get("thread_name", "?")
+        if "pid" in meta:
+            thread_marker = f"{meta['pid']}/{thread_marker}"
 
-        if "thread_name" in meta:
-            thread_marker = meta["thread_name"]
-        else:
-            thread_marker = "?"
-
-        if LOG_IGNORE:
-            for ignore in LOG_IGNORE.split(","):
-                if ignore[-1] == "*" and name.startswith(ignore[:-1]):
-                    return
-                elif ignore == name:
-                    return
-
-        if LOG_FOCUS:
-            for focus in LOG_FOCUS.split(","):
-                if focus[-1] == "*" and not name.startswith(ignore[:-1]):
-                    return
-                elif focus != name:
-                    return
+        if log_level < min_level(name):
+            return None
 
         if log_level < 10:
             color = ANSICode.MAGENTA
@@ -115,15 +171,14 @@ class Printer:
         else:
             color = ANSICode.BG_RED
 
-        output = "%s[%s][%s@%s]:%s %s" % (
+        return "%s[%s][%s@%s]:%s %s" % (
             color,
             log_level,
             name,
             thread_marker,
             ANSICode.RESET,
-            " ".join([str(item) for item in args]),
+            render(args),
         )
-        print(output, flush=True)
 
 
 class ClassicPrinter(Printer):
@@ -138,37 +193,128 @@ class ClassicPrinter(Printer):
 
 
 class ThreadedPrinter(Printer):
-    def __init__(self) -> None:
-        self.deque = deque()
-        self.wait_time = 0.10
+    def __init__(
+        self,
+        max_size: int = LOG_QUEUE_SIZE,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        flush_level: int = LOG_FLUSH_LEVEL,
+        out: T.Optional[T.TextIO] = None,
+    ) -> None:
+        self.deque: T.Deque[T.Tuple[T.Tuple, T.Dict[str, T.Any], LOG_LEVEL_t]] = deque()
+        self.max_size = max_size
+        self.flush_interval = flush_interval
+        self.flush_level = flush_level
+        self.out = out
+        self.dropped = 0
+        self.dropped_total = 0
+        self.cond = threading.Condition()
         self.stop_event = threading.Event()
         self.main_thread_ref = weakref.ref(threading.main_thread())
         self.thread = threading.Thread(name="Printer", target=self.worker, daemon=False)
+        self.watcher = threading.Thread(name="Printer|watcher", target=self.watch, daemon=True)
 
     def start(self) -> None:
         self.thread.start()
+        self.watcher.start()
 
     def stop(self) -> None:
-        self.stop_event.set()
+        with self.cond:
+            self.stop_event.set()
+            self.cond.notify()
+
+    def watch(self) -> None:
+        # NOTE: The main thread counts as finished once the interpreter starts shutting down, the worker is still joined
+        main_thread = self.main_thread_ref()
+        if main_thread is not None:
+            main_thread.join()
+        self.stop()
 
     def add_log(self, *args: T.Any, meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> None:
-        if self.stop_event.is_set():
-            raise RuntimeError("Printer stopped")
-        self.deque.append((args, meta, log_level))
+        if self.stop_event.is_set():  # NOTE: Threads still logging during shutdown, write directly
+            self._log(*args, meta=meta, log_level=log_level)
+            return
 
-    @property
-    def _stop_condtion(self) -> bool:
-        return (
-            self.stop_event.is_set() or not (self.main_thread_ref() and self.main_thread_ref().is_alive())  # type: ignore
-        ) and len(self.deque) == 0
+        with self.cond:
+            if len(self.deque) >= self.max_size:
+                self.dropped += 1
+                return
+            self.deque.append((args, meta, log_level))
+            if len(self.deque) == 1:
+                self.cond.notify()
 
     def worker(self) -> None:
-        while not self._stop_condtion:
-            try:
-                args, meta, log_level = self.deque.popleft()
-                self._log(*args, meta=meta, log_level=log_level)
-            except IndexError:
-                time.sleep(self.wait_time)
+        dirty = False
+        last_flush = time.monotonic()
+        while True:
+            with self.cond:
+                while not self.deque and not self.stop_event.is_set():
+                    if not dirty:
+                        self.cond.wait()
+                    elif not self.cond.wait(max(last_flush + self.flush_interval - time.monotonic(), 0)):
+                        break
+                records, self.deque = self.deque, deque()
+                dropped, self.dropped = self.dropped, 0
+                stopping = self.stop_event.is_set() and not records
+
+            dirty |= self.write(records, dropped)
+
+            urgent = any(interpret_log_level(log_level) >= self.flush_level for _, _, log_level in records)
+            now = time.monotonic()
+            if dirty and (urgent or stopping or not records or now - last_flush >= self.flush_interval):
+                self.flush()
+                dirty = False
+                last_flush = now
+
+            if stopping:
+                self.close()
+                return
+
+    def flush(self) -> None:
+        (self.out or sys.stdout).flush()
+
+    def close(self) -> None:
+        pass
+
+    def write(self, records: T.Iterable, dropped: int) -> bool:
+        lines = []
+        for args, meta, log_level in records:
+            output = self._format(*args, meta=meta, log_level=log_level)
+            if output is not None:
+                lines.append(output)
+
+        if dropped:
+            self.dropped_total += dropped
+            lines.append(f"{ANSICode.YELLOW}[Printer]:{ANSICode.RESET} Dropped {dropped} log records, queue full")
+
+        if lines:
+            lines.append("")
+            (self.out or sys.stdout).write("\n".join(lines))
+        return bool(lines)
+
+
+class TeePrinter(Printer):
+    def __init__(self, printers: T.List[Printer]) -> None:
+        self.printers = printers
+
+    def start(self) -> None:
+        for printer in self.printers:
+            printer.start()
+
+    def stop(self) -> None:
+        for printer in self.printers:
+            printer.stop()
+
+    def add_log(self, *args: T.Any, meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> None:
+        # NOTE: Sinks render on different threads, a lazy message is resolved once here so its side effects happen once
+        if interpret_log_level(log_level) < min_level(meta.get("name", "?")):
+            return
+        try:
+            args = evaluate(args)
+        except Exception as e:
+            args = (render_failed(e),)
+
+        for printer in self.printers:
+            printer.add_log(*args, meta=meta, log_level=log_level)
 
 
 class PrinterManager:
@@ -178,59 +324,189 @@ class PrinterManager:
 
     def capture_printer(self) -> Printer:
         if self.ref_count == 0:
-            if LOG_THREADED:
-                self.printer = ThreadedPrinter()
-            else:
-                self.printer = ClassicPrinter()
+            self.printer = self.build_printer()
             self.printer.start()
         self.ref_count += 1
         return self.printer  # type: ignore
 
+    @staticmethod
+    def build_printer() -> Printer:
+        # NOTE: Read at build time, the aggregating parent sets these for the processes it starts
+        aggregate = os.getenv("LOG_AGGREGATE")
+        if aggregate and os.getenv("LOG_AGGREGATE_PID") != str(os.getpid()):
+            from cent.logging.aggregate import ForwardPrinter
+
+            return ForwardPrinter(aggregate)
+
+        printers: T.List[Printer] = []
+        if LOG_STDOUT:
+            printers.append(ThreadedPrinter() if LOG_THREADED else ClassicPrinter())
+        if LOG_FILE or LOG_RING:
+            from cent.logging.sinks import FileSink, RingSink
+
+            if LOG_FILE:
+                printers.append(FileSink(LOG_FILE))
+            if LOG_RING:
+                printers.append(RingSink(LOG_RING))
+        return printers[0] if len(printers) == 1 else TeePrinter(printers)
+
     def release_printer(self) -> None:
         self.ref_count -= 1
         if self.ref_count == 0:
             self.printer.stop()  # type: ignore
-            del self.printer
         elif self.ref_count < 0:
             raise RuntimeError("Ref count less than 0")
 
+    def after_fork(self) -> None:
+        # NOTE: The printer thread doesn't survive a fork, the child builds its own (a forwarder when aggregating)
+        if self.ref_count > 0:
+            self.printer = self.build_printer()
+            self.printer.start()
+
 
 PRINTER_MANAGER = PrinterManager()
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=PRINTER_MANAGER.after_fork)
 
 
+# NOTE: Args are joined with spaces when printed, see Format and `evaluate` for lazy messages
 class Logger:
     def __init__(self, name: str) -> None:
         self.name = name
-        self.printer = PRINTER_MANAGER.capture_printer()
+        self.level = min_level(name)
+        PRINTER_MANAGER.capture_printer()
         atexit.register(lambda: PRINTER_MANAGER.release_printer())
 
+    @property
+    def printer(self) -> Printer:
+        return PRINTER_MANAGER.printer  # type: ignore
+
+    def enabled(self, log_level: LOG_LEVEL_t) -> bool:
+        return interpret_log_level(log_level) >= self.level
+
     def log(self, *args: T.Any, log_level: LOG_LEVEL_t = "NOTSET") -> None:
-        if interpret_log_level(log_level) < LOG_LEVEL:  # NOTE: Pre-filter
+        log_level = interpret_log_level(log_level)
+        if log_level < self.level:  # NOTE: Pre-filter
             return
+        self.emit(args, log_level)
 
+    def emit(self, args: T.Tuple[T.Any, ...], log_level: int) -> None:
         self.printer.add_log(
             *args,
             meta={
                 "name": self.name,
                 "thread_name": threading.current_thread().name,
+                "time": time.time(),
             },
             log_level=log_level,
         )
 
     def debug(self, *args: T.Any) -> None:
-        return self.log(*args, log_level="DEBUG")
+        if DEBUG >= self.level:
+            self.emit(args, DEBUG)
 
     def info(self, *args: T.Any) -> None:
-        return self.log(*args, log_level="INFO")
+        if INFO >= self.level:
+            self.emit(args, INFO)
 
     def warning(self, *args: T.Any) -> None:
-        return self.log(*args, log_level="WARNING")
+        if WARNING >= self.level:
+            self.emit(args, WARNING)
 
     def error(self, *args: T.Any) -> None:
-        return self.log(*args, log_level="ERROR")
+        if ERROR >= self.level:
+            self.emit(args, ERROR)
 
     def critical(self, *args: T.Any) -> None:
-        return self.log(*args, log_level="CRITICAL")
+        if CRITICAL >= self.level:
+            self.emit(args, CRITICAL)
+
+    def limited(
+        self,
+        rate: T.Optional[float] = None,
+        sample: T.Optional[int] = None,
+        burst: T.Optional[float] = None,
+        summary: float = LOG_SUMMARY_INTERVAL,
+    ) -> "Logger.Limited":
+        return Logger.Limited(self, rate, sample, burst, summary)
+
+    # NOTE: One per call site, e.g. `log_msg = log.limited(rate=10)` next to `log`, then `log_msg.info(...)`.
+    #       Keeps every `sample`-th record, then at most `rate`/s (token bucket of `burst`), and reports how many were
+    #       suppressed along with the first record let through after `summary` seconds. Counters aren't locked, under
+    #       contention the limits are approximate.
+    class Limited:
+        def __init__(
+            self, logger: "Logger", rate: T.Optional[float], sample: T.Optional[int], burst: T.Optional[float], summary: float
+        ) -> None:
+            assert rate is None or rate > 0
+            assert sample is None or sample >= 1
+            self.logger = logger
+            self.rate = rate
+            self.sample = sample
+            self.burst = max(burst or rate or 1, 1)
+            self.summary = summary
+            self.tokens = self.burst
+            self.seen = 0
+            self.suppressed = 0
+            self.suppressed_total = 0
+            self.last = time.monotonic()
+            self.last_summary = self.last
+
+        def allow(self) -> bool:
+            self.seen += 1
+            if self.sample is not None and self.seen % self.sample:
+                self.suppressed += 1
+                return False
+
+            if self.rate is not None:
+                now = time.monotonic()
+                self.tokens = min(self.tokens + (now - self.last) * self.rate, self.burst)
+                self.last = now
+                if self.tokens < 1:
+                    self.suppressed += 1
+                    return False
+                self.tokens -= 1
+            return True
+
+        def emit(self, args: T.Tuple[T.Any, ...], log_level: int) -> None:
+            if not self.allow():
+                return
+
+            if self.suppressed:
+                now = time.monotonic()
+                if now - self.last_summary >= self.summary:
+                    suppressed, self.suppressed = self.suppressed, 0
+                    self.suppressed_total += suppressed
+                    self.logger.emit(
+                        (Format("Suppressed %d records in %.1fs", suppressed, now - self.last_summary),), log_level
+                    )
+                    self.last_summary = now
+            self.logger.emit(args, log_level)
+
+        def log(self, *args: T.Any, log_level: LOG_LEVEL_t = "NOTSET") -> None:
+            log_level = interpret_log_level(log_level)
+            if log_level >= self.logger.level:
+                self.emit(args, log_level)
+
+        def debug(self, *args: T.Any) -> None:
+            if DEBUG >= self.logger.level:
+                self.emit(args, DEBUG)
+
+        def info(self, *args: T.Any) -> None:
+            if INFO >= self.logger.level:
+                self.emit(args, INFO)
+
+        def warning(self, *args: T.Any) -> None:
+            if WARNING >= self.logger.level:
+                self.emit(args, WARNING)
+
+        def error(self, *args: T.Any) -> None:
+            if ERROR >= self.logger.level:
+                self.emit(args, ERROR)
+
+        def critical(self, *args: T.Any) -> None:
+            if CRITICAL >= self.logger.level:
+                self.emit(args, CRITICAL)
 
 
 # ---
@@ -239,12 +515,22 @@ class Logger:
 class CustomHandler(py_logging.Handler):
     def __init__(self, level: int = py_logging.NOTSET):
         super().__init__(level)
-        self.printer = PRINTER_MANAGER.capture_printer()
+        PRINTER_MANAGER.capture_printer()
+
+    @property
+    def printer(self) -> Printer:
+        return PRINTER_MANAGER.printer  # type: ignore
 
     def emit(self, record: py_logging.LogRecord) -> None:
+        if record.levelno < min_level(record.name):
+            return
         log_entry = self.format(record)
 
-        self.printer.add_log(log_entry, meta={"name": record.name}, log_level=record.levelno)
+        self.printer.add_log(
+            log_entry,
+            meta={"name": record.name, "thread_name": record.threadName, "time": record.created},
+            log_level=record.levelno,
+        )
 
 
 root_py_logger = py_logging.getLogger()
@@ -0,0 +1,206 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import typing as T
+
+from cent.logging.logging import WARNING, LOG_LEVEL_t, Printer, ThreadedPrinter, interpret_log_level, min_level, render
+
+LOG_FILE_MAX_BYTES = int(os.getenv("LOG_FILE_MAX_BYTES") or 64 << 20)
+LOG_FILE_INTERVAL = float(os.getenv("LOG_FILE_INTERVAL") or 0)
+LOG_FILE_BACKUPS = int(os.getenv("LOG_FILE_BACKUPS") or 5)
+LOG_RING_SIZE = int(os.getenv("LOG_RING_SIZE") or 8 << 20)
+
+RING_MAGIC = b"CLRB"
+RING_VERSION = 1
+RING_HEADER = struct.Struct("<4sIQQ")  # NOTE: magic, version, capacity, head (total bytes ever written)
+RING_HEADER_SIZE = 64
+
+
+# NOTE: One JSON object per line, ensure_ascii keeps raw newlines out of the payload so "\n" always ends a record
+def encode(args: T.Tuple[T.Any, ...], meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> T.Optional[bytes]:
+    log_level = interpret_log_level(log_level)
+    name = meta.get("name", "?")
+    if log_level < min_level(name):
+        return None
+
+    record = {
+        "time": meta.get("time") or time.time(),
+        "level": log_level,
+        "name": name,
+        "thread": meta.get("thread_name", "?"),
+        "msg": render(args),
+    }
+    for key, value in meta.items():
+        if key not in ("time", "name", "thread_name"):
+            record[key] = value
+    return json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+
+
+def decode(line: bytes) -> T.Dict[str, T.Any]:
+    return json.loads(line)
+
+
+def pretty(record: T.Dict[str, T.Any]) -> str:
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record["time"])) + f".{int(record['time'] % 1 * 1e3):03d}"
+    return f"{stamp} [{record['level']}][{record['name']}@{record['thread']}]: {record['msg']}"
+
+
+# NOTE: NDJSON file, rotated to `path.1` .. `path.<backups>` once it passes `max_bytes` or is older than `interval`
+class FileSink(ThreadedPrinter):
+    def __init__(
+        self,
+        path: str,
+        max_bytes: int = LOG_FILE_MAX_BYTES,
+        interval: float = LOG_FILE_INTERVAL,
+        backups: int = LOG_FILE_BACKUPS,
+        **kwargs: T.Any,
+    ) -> None:
+        super().__init__(**kwargs)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.backups = backups
+        self.file: T.Optional[T.BinaryIO] = None
+        self.opened = 0.0
+
+    def start(self) -> None:
+        self.open()
+        super().start()
+
+    def open(self) -> None:
+        self.file = open(self.path, "ab")
+        self.opened = time.time()
+
+    def close(self) -> None:
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def flush(self) -> None:
+        if self.file is not None:
+            self.file.flush()
+
+    def write(self, records: T.Iterable, dropped: int) -> bool:
+        assert self.file is not None
+
+        lines = []
+        for args, meta, log_level in records:
+            line = encode(args, meta, log_level)
+            if line is not None:
+                lines.append(line)
+        if dropped:
+            self.dropped_total += dropped
+            lines.append(encode((f"Dropped {dropped} log records, queue full",), {"name": "Printer"}, WARNING) or b"")
+
+        if not lines:
+            return False
+        self.file.write(b"".join(lines))
+
+        if self.file.tell() >= self.max_bytes or (self.interval and time.time() - self.opened >= self.interval):
+            self.rotate()
+        return True
+
+    def rotate(self) -> None:
+        self.close()
+        for i in reversed(range(1, self.backups)):
+            if os.path.exists(f"{self.path}.{i}"):
+                os.replace(f"{self.path}.{i}", f"{self.path}.{i + 1}")
+        if self.backups > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self.open()
+
+
+# NOTE: Keeps the last `size` bytes of records in a memory mapped file, written on the calling thread so nothing is
+#       buffered in the process when it dies. The head is bumped after the data, a torn record is dropped on dump.
+class RingSink(Printer):
+    def __init__(self, path: str, size: int = LOG_RING_SIZE) -> None:
+        self.path = path
+        self.capacity = size
+        self.lock = threading.Lock()
+        self.mm: T.Optional[mmap.mmap] = None
+        self.head = 0
+
+    def start(self) -> None:
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            total = RING_HEADER_SIZE + self.capacity
+            header = os.pread(fd, RING_HEADER.size, 0)
+            if os.fstat(fd).st_size != total:
+                os.ftruncate(fd, total)
+            self.mm = mmap.mmap(fd, total)
+        finally:
+            os.close(fd)
+
+        magic, version, capacity, head = RING_HEADER.unpack(header) if len(header) == RING_HEADER.size else (b"", 0, 0, 0)
+        if magic == RING_MAGIC and version == RING_VERSION and capacity == self.capacity:
+            self.head = head  # NOTE: Same ring from an earlier run, keep appending after its records
+        else:
+            self.head = 0
+            RING_HEADER.pack_into(self.mm, 0, RING_MAGIC, RING_VERSION, self.capacity, 0)
+
+    def stop(self) -> None:
+        with self.lock:
+            if self.mm is not None:
+                self.mm.flush()
+                self.mm.close()
+                self.mm = None
+
+    def add_log(self, *args: T.Any, meta: T.Dict[str, T.Any], log_level: LOG_LEVEL_t) -> None:
+        data = encode(args, meta, log_level)
+        if data is None or len(data) > self.capacity:
+            return
+
+        with self.lock:
+            if self.mm is None:
+                return
+            pos = self.head % self.capacity
+            end = pos + len(data)
+            if end <= self.capacity:
+                self.mm[RING_HEADER_SIZE + pos : RING_HEADER_SIZE + end] = data
+            else:
+                split = self.capacity - pos
+                self.mm[RING_HEADER_SIZE + pos : RING_HEADER_SIZE + self.capacity] = data[:split]
+                self.mm[RING_HEADER_SIZE : RING_HEADER_SIZE + len(data) - split] = data[split:]
+            self.head += len(data)
+            struct.pack_into("<Q", self.mm, 16, self.head)
+
+
+def dump(path: str) -> T.List[bytes]:
+    with open(path, "rb") as f:
+        header = f.read(RING_HEADER_SIZE)
+        magic, version, capacity, head = RING_HEADER.unpack_from(header)
+        if magic != RING_MAGIC or version != RING_VERSION:
+            raise ValueError(f"Not a log ring buffer: {path}")
+        data = f.read(capacity)
+
+    if head <= capacity:
+        buf = data[:head]
+    else:
+        pos = head % capacity
+        buf = data[pos:] + data[:pos]
+        buf = buf[buf.find(b"\n") + 1 :]  # NOTE: Oldest record was partly overwritten
+    return buf.split(b"\n")[:-1]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dump a cent.logging ring buffer")
+    parser.add_argument("path")
+    parser.add_argument("--json", action="store_true", help="Print raw NDJSON records")
+    parser.add_argument("-n", "--tail", type=int, help="Only the last N records")
+    args = parser.parse_args()
+
+    lines = dump(args.path)
+    if args.tail is not None:
+        lines = lines[-args.tail :]
+    for line in lines:
+        try:
+            print(line.decode() if args.json else pretty(decode(line)))
+        except ValueError:
+            print(f"<corrupt record: {line[:80]!r}>", file=sys.stderr)
@@ -0,0 +1,38 @@
+import os
+
+from cent.logging.aggregate import Aggregator, ForwardPrinter
+from cent.logging.logging import PRINTER_MANAGER
+
+
+class Recorder:
+    def __init__(self) -> None:
+        self.records = []
+
+    def add_log(self, *args, meta, log_level) -> None:
+        self.records.append((args, meta, log_level))
+
+    def stop(self) -> None:
+        pass
+
+
+def test_forwarded_records_keep_metadata(monkeypatch):
+    aggregator = Aggregator().start()
+    recorder = Recorder()
+    monkeypatch.setattr(PRINTER_MANAGER, "printer", recorder)
+    assert os.environ["LOG_AGGREGATE"] == aggregator.path
+
+    forward = ForwardPrinter(aggregator.path)
+    forward.start()
+    meta = {"name": "child", "thread_name": "w0", "time": 1.5}
+    forward.add_log("sent %d to %s", 3, object, meta=meta, log_level=20)
+    forward.add_log(lambda: "lazy", meta=meta, log_level=30)
+    forward.add_log(lambda: 1 / 0, meta=meta, log_level=30)
+    forward.stop()
+    forward.thread.join(1)
+    aggregator.stop()
+
+    assert "LOG_AGGREGATE" not in os.environ and not os.path.exists(aggregator.path)
+    (args, meta, level), (lazy, _, _), (failed, _, _) = recorder.records
+    assert args == ("sent %d to %s", 3, str(object)) and level == 20 and lazy == ("lazy",)
+    assert failed[0].startswith("<failed to render log message: ZeroDivisionError")
+    assert meta["pid"] == os.getpid() and meta["thread_name"] == "w0" and meta["time"] == 1.5
@@ -0,0 +1,101 @@
+import io
+import time
+
+from cent.logging import logging
+from cent.logging.logging import Format, Logger, Rules, TeePrinter, ThreadedPrinter, render
+
+
+def test_threaded_printer_batches_and_counts_drops():
+    out = io.StringIO()
+    printer = ThreadedPrinter(max_size=3, flush_interval=60, out=out)
+    meta = {"name": "test", "thread_name": "main"}
+    for i in range(5):
+        printer.add_log("line", i, meta=meta, log_level="ERROR")
+    assert printer.dropped == 2
+
+    printer.start()
+    printer.stop()
+    printer.thread.join(1)
+    assert not printer.thread.is_alive()
+
+    lines = out.getvalue().splitlines()
+    assert len(lines) == 4
+    assert all(line.endswith(f"line {i}") for i, line in enumerate(lines[:3]))
+    assert "Dropped 2 log records" in lines[3]
+    assert printer.dropped_total == 2
+
+
+def test_rules_and_lazy_render():
+    rules = Rules("cent.ether.*, x.b")
+    assert rules.match("cent.ether.impl.root") and rules.match("x.b")
+    assert not rules.match("x.bb") and not rules.match("cent.call")
+    assert not Rules(None) and not Rules(" ,")
+
+    calls = []
+    assert render((Format("sent %d bytes to %s", 3, "a"),)) == "sent 3 bytes to a"
+    assert render(("100% done:", 5)) == "100% done: 5"
+    assert render((lambda: calls.append(1) or "lazy",)) == "lazy" and calls == [1]
+    assert render((dict, 1)) == "<class 'dict'> 1"
+    assert render((lambda: 1 / 0,)) == "<failed to render log message: ZeroDivisionError - division by zero>"
+    assert render((Format("%d", "x"),)).startswith("<failed to render log message: TypeError")
+
+
+def test_threaded_printer_survives_failing_messages():
+    out = io.StringIO()
+    printer = ThreadedPrinter(out=out)
+    printer.start()
+    printer.add_log(lambda: 1 / 0, meta={"name": "test"}, log_level="ERROR")
+    printer.add_log("after", meta={"name": "test"}, log_level="ERROR")
+    printer.stop()
+    printer.thread.join(1)
+
+    first, second = out.getvalue().splitlines()
+    assert "ZeroDivisionError" in first and second.endswith("after")
+
+
+def test_tee_printer_evaluates_lazy_messages_once(monkeypatch):
+    monkeypatch.setattr(logging, "min_level", lambda name: 0)
+    outs = [io.StringIO(), io.StringIO()]
+    printer = TeePrinter([ThreadedPrinter(out=out) for out in outs])
+    printer.start()
+
+    calls = []
+    printer.add_log(lambda: calls.append(1) or "lazy", meta={"name": "test"}, log_level="ERROR")
+    printer.add_log(lambda: 1 / 0, meta={"name": "test"}, log_level="ERROR")
+    printer.stop()
+    for sink in printer.printers:
+        sink.thread.join(1)  # type: ignore
+
+    assert calls == [1]
+    for out in outs:
+        lazy, failed = out.getvalue().splitlines()
+        assert lazy.endswith("lazy") and "ZeroDivisionError" in failed
+
+
+class Sink:
+    def __init__(self) -> None:
+        self.level = 0
+        self.records = []
+
+    def emit(self, args, log_level) -> None:
+        self.records.append(args)
+
+
+def test_limited_samples_rate_limits_and_summarizes():
+    sink = Sink()
+    sampled = Logger.Limited(sink, None, 3, None, 0)  # type: ignore
+    for i in range(9):
+        sampled.info("msg", i)
+    assert [args[-1] for args in sink.records if args[0] == "msg"] == [2, 5, 8]
+    assert sampled.suppressed_total == 6 and sampled.suppressed == 0 and len(sink.records) == 6
+
+    sink.records.clear()
+    limited = Logger.Limited(sink, 1000, None, 5, 60)  # type: ignore
+    for i in range(100):
+        limited.info("msg", i)
+    assert len(sink.records) == 5 and limited.suppressed == 95
+
+    limited.last_summary -= 60
+    time.sleep(0.01)
+    limited.info("msg", 100)
+    assert str(sink.records[-2][0]).startswith("Suppressed 95 records in") and sink.records[-1] == ("msg", 100)
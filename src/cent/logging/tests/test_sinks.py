@@ -0,0 +1,53 @@
+import json
+import os
+import time
+
+import pytest
+
+from cent.logging import sinks
+from cent.logging.sinks import FileSink, RingSink, decode, dump
+
+META = {"name": "test", "thread_name": "main", "time": 1.0}
+
+
+# NOTE: Records are INFO, keep them regardless of the LOG_LEVEL/filters the suite runs under
+@pytest.fixture(autouse=True)
+def all_levels(monkeypatch):
+    monkeypatch.setattr(sinks, "min_level", lambda name: 0)
+
+
+def test_ring_keeps_newest_records(tmp_path):
+    path = str(tmp_path / "ring")
+    ring = RingSink(path, 1000)
+    ring.start()
+    for i in range(100):
+        ring.add_log("record", i, meta=META, log_level="INFO")
+    ring.stop()
+
+    records = [decode(line) for line in dump(path)]
+    assert 0 < len(records) < 100
+    assert [r["msg"] for r in records] == [f"record {i}" for i in range(100 - len(records), 100)]
+
+    ring = RingSink(path, 1000)
+    ring.start()
+    ring.add_log("after restart", meta=META, log_level="INFO")
+    ring.stop()
+    assert decode(dump(path)[-1])["msg"] == "after restart"
+
+
+def test_file_sink_rotates(tmp_path):
+    path = str(tmp_path / "log.ndjson")
+    sink = FileSink(path, max_bytes=500, backups=2, flush_interval=0)
+    sink.start()
+    for i in range(50):
+        sink.add_log("record", i, meta=META, log_level="INFO")
+        time.sleep(0.001)
+    sink.stop()
+    sink.thread.join(1)
+
+    assert os.path.exists(path + ".2") and not os.path.exists(path + ".3")
+    files = [name for name in (path + ".2", path + ".1", path) if os.path.exists(name)]
+    records = [json.loads(line) for name in files for line in open(name)]
+    assert all(record["name"] == "test" and record["thread"] == "main" for record in records)
+    msgs = [record["msg"] for record in records]
+    assert msgs == [f"record {i}" for i in range(50 - len(msgs), 50)]
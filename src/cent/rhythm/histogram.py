@@ -0,0 +1,73 @@
+import math
+import typing as T
+
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+
+# NOTE: Log-spaced buckets, so memory stays constant and quantiles are off by at most `precision` (relative)
+class Histogram:
+    def __init__(self, precision: float = 0.01) -> None:
+        self.growth = math.log((1 + precision) / (1 - precision))
+        self.buckets: T.Dict[int, int] = {}
+        self.zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def record(self, value: float, n: int = 1) -> None:
+        if value > 0:
+            idx = math.floor(math.log(value) / self.growth)
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        else:
+            value = 0
+            self.zeros += n
+
+        self.count += n
+        self.sum += value * n
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def record_corrected(self, value: float, interval: float) -> None:
+        # NOTE: Coordinated omission, a stall also delayed the requests that should have been sent during it
+        self.record(value)
+        if interval <= 0:
+            return
+        missed = value - interval
+        while missed >= interval:
+            self.record(missed)
+            missed -= interval
+
+    def merge(self, other: "Histogram") -> None:
+        for idx, n in other.buckets.items():
+            self.buckets[idx] = self.buckets.get(idx, 0) + n
+        self.zeros += other.zeros
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def quantile(self, q: float) -> float:
+        if self.count == 0:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for idx in sorted(self.buckets):
+            seen += self.buckets[idx]
+            if rank < seen:
+                return min(max(math.exp((idx + 0.5) * self.growth), self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> T.Dict[str, float]:
+        if self.count == 0:
+            return {"count": 0}
+
+        snapshot = {"count": self.count, "mean": self.sum / self.count, "min": self.min, "max": self.max}
+        for q in QUANTILES:
+            snapshot[f"p{q * 100:g}"] = self.quantile(q)
+        return snapshot
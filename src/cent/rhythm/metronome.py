@@ -1,8 +1,16 @@
+import math
 import time
 import typing as T
 
+from cent.rhythm.histogram import Histogram
 from cent.rhythm.unit import Seconds, Timestamp
-from cent.rhythm.util import floor_time
+
+MISSED_SKIP = "skip"  # NOTE: Drop missed ticks, wait for the next one on the grid
+MISSED_CATCH_UP = "catch_up"  # NOTE: Fire every missed tick back to back until caught up
+MISSED_COALESCE = "coalesce"  # NOTE: Fire once right away for all missed ticks, then continue on the grid
+MISSED_POLICIES = (MISSED_SKIP, MISSED_CATCH_UP, MISSED_COALESCE)
+
+SPIN_THRESHOLD: Seconds = 0.002
 
 
 class MetronomeException(Exception):
@@ -24,50 +32,95 @@ class Metronome:
 
     START_TOLERANCE: Seconds = 0.001
 
-    def __init__(self, period: Seconds, skippable: bool = False, strict: bool = True) -> None:
+    # NOTE: `precise` runs on perf_counter (monotonic, unaffected by clock adjustments) and sleeps until `spin` before
+    #       each deadline, then busy waits the rest. Deadlines are `start_time + n * period`, so errors don't accumulate.
+    def __init__(
+        self,
+        period: Seconds,
+        skippable: bool = False,
+        strict: bool = True,
+        precise: bool = False,
+        spin: T.Optional[Seconds] = None,
+        missed: str = MISSED_SKIP,
+    ) -> None:
+        assert missed in MISSED_POLICIES, f"Unknown missed tick policy: {missed}"
         self.period = period
         self.skippable = skippable
         self.strict = strict
+        self.precise = precise
+        self.spin = (SPIN_THRESHOLD if spin is None else spin) if precise else 0
+        self.missed_policy = missed
 
         self.reset()
         pass
 
     def _current_time(self) -> Seconds:
-        return time.time()
+        return time.perf_counter() if self.precise else time.time()
+
+    def _sleep(self, seconds: Seconds) -> None:
+        time.sleep(seconds)
 
     def reset(self, floor: bool = False) -> None:
         self.start_time: Seconds = self._current_time()
         if floor:
-            self.start_time = floor_time(self.start_time, self.period)
+            # NOTE: Aligned to the wall clock grid, also when measuring on perf_counter
+            self.start_time -= time.time() % self.period
         self.last_time = None
         self.ticks = 0
+        self.index = 0
+        self.deadline = self.start_time
+
+        self.missed = 0
+        self.overruns = 0
+        self.lateness = Histogram()
+
+    def sleep_until(self, deadline: Seconds) -> None:
+        remaining = deadline - self._current_time()
+        if not self.precise:
+            # NOTE: No spinning on the wall clock, it can step backwards while we wait
+            if remaining > 0:
+                self._sleep(remaining)
+            return
+
+        if remaining > self.spin:
+            self._sleep(remaining - self.spin)
+        while self._current_time() < deadline:
+            pass
 
     def tick(self) -> bool:
         current_time = self._current_time()
-        start_delta_m = (current_time - self.start_time) % self.period
-        sleep_time = max(self.period - start_delta_m, 0)
-
-        # print(
-        #     f"SDM: {start_delta_m:.4f} | SD: {current_time - self.start_time:.4f} | ST: {sleep_time:.4f}"
-        # )
 
         if self.last_time is None:
-            if start_delta_m > self.START_TOLERANCE:
-                # print("Sleeping", sleep_time)
-                time.sleep(sleep_time)
+            self.index = math.ceil((current_time - self.start_time - self.START_TOLERANCE) / self.period)
+            self.deadline = self.start_time + self.index * self.period
         else:
             delta = current_time - self.last_time
             if delta > self.period:
-                message = f"Timeout! Got {delta}, expected {self.period}"
+                self.overruns += 1
                 if self.strict:
-                    raise Timeout(message)
+                    raise Timeout(f"Timeout! Got {delta}, expected {self.period}")
+
+            self.index += 1
+            self.deadline = self.start_time + self.index * self.period
+            late = current_time - self.deadline
+            if self.skippable:
+                self.deadline = current_time
+            elif late > 0:
+                if self.missed_policy == MISSED_SKIP:
+                    skipped = math.floor(late / self.period) + 1
+                elif self.missed_policy == MISSED_COALESCE:
+                    skipped = math.floor(late / self.period)
                 else:
-                    print(message)
+                    skipped = 0
+                self.index += skipped
+                self.missed += skipped
+                self.deadline = self.start_time + self.index * self.period
 
-            if not self.skippable:
-                time.sleep(sleep_time)
+        if self.deadline > current_time:
+            self.sleep_until(self.deadline)
 
         self.last_time = self._current_time()
+        self.lateness.record(self.last_time - self.deadline)
         self.ticks += 1
         return True
 
@@ -75,6 +128,14 @@ class Metronome:
     def elapsed(self) -> Seconds:
         return self.ticks * self.period
 
+    def stats(self) -> T.Dict[str, T.Any]:
+        return {
+            "ticks": self.ticks,
+            "missed": self.missed,
+            "overruns": self.overruns,
+            "lateness": self.lateness.snapshot(),
+        }
+
 
 if __name__ == "__main__":
     import subprocess
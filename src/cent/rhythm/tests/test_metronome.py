@@ -0,0 +1,50 @@
+import pytest
+
+from cent.rhythm.metronome import MISSED_CATCH_UP, MISSED_COALESCE, MISSED_SKIP, Metronome, Timeout
+
+
+class FakeMetronome(Metronome):
+    def __init__(self, *args, **kwargs) -> None:
+        self.now = 100.0
+        super().__init__(*args, **kwargs)
+
+    def _current_time(self) -> float:
+        self.now += 1e-6  # NOTE: Keeps the spin loop moving
+        return self.now
+
+    def _sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.mark.parametrize(
+    "policy, missed, ticks",
+    [
+        (MISSED_SKIP, 2, [0, 1, 4, 5]),
+        (MISSED_COALESCE, 1, [0, 1, 3.5, 4]),
+        (MISSED_CATCH_UP, 0, [0, 1, 3.5, 3.6]),
+    ],
+)
+def test_missed_tick_policies(policy, missed, ticks):
+    m = FakeMetronome(1.0, strict=False, missed=policy)
+    start = m.start_time
+    times = []
+    for work in (0.1, 2.5, 0.1, 0.1):
+        m.tick()
+        times.append(round(m.last_time - start, 2))
+        m.now += work
+    assert times == ticks
+    assert m.missed == missed and m.overruns == 1
+    assert m.stats()["lateness"]["count"] == 4
+
+
+def test_strict_and_precise():
+    m = FakeMetronome(0.001, precise=True)
+    assert m.spin > 0
+    m.tick()
+    m.now += 0.0005
+    m.tick()
+    assert m.stats()["lateness"]["max"] < 1e-4
+
+    m.now += 0.01
+    with pytest.raises(Timeout):
+        m.tick()